@@ -2,23 +2,48 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import date
 import os
+import sys
+import tempfile
+import time
+
+from store import TAX_RATE, RestaurantStore, build_order
+from salesreport import SalesReport
+from menuindex import MenuIndex
+from stockserver import StockClient
 
-TAX_RATE = 1.065
 MENU_FILE = "menu.txt"
 SALES_FILE = "sales.txt"
+DB_FILE = "restaurant.db"
+SALES_PAGE = 500
+SALES_ROW_HEIGHT = 25
+SEARCH_LIMIT = 50
 
 class RestaurantManagementSystem:
-    def __init__(self, root):
+    def __init__(self, root, db_file=DB_FILE, standalone=False):
         self.root = root
         self.root.title("Restaurant Management System")
         self.root.geometry("950x600")
         self.root.configure(bg="#f0f4f8")
 
-        self.qty_vars = {}
-        self.qty_widgets = {}
+        self.qty = {}
+        self.tree_rows = {}
+        # standalone: only db_file, without the legacy text files or the stock server
+        if standalone:
+            self.store = RestaurantStore(db_file)
+        else:
+            self.store = RestaurantStore(db_file, legacy_menu=MENU_FILE, legacy_sales=SALES_FILE)
+        # Tills sharing one database send stock changes through the stock server
+        server = None if standalone else os.environ.get("STOCK_SERVER")
+        self.stock = StockClient.from_address(server) if server else self.store
         self.menu = {}
         self.load_menu()
 
+        self.sales_total = 0
+        self.sales_offset = 0
+        self.sales_visible = 20
+        self.sales_cache = []
+        self.sales_cache_start = 0
+
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
@@ -36,18 +61,12 @@ class RestaurantManagementSystem:
 
     def load_menu(self):
         self.menu.clear()
-        if not os.path.exists(MENU_FILE):
-            open(MENU_FILE, "w").close()
-        with open(MENU_FILE) as f:
-            for line in f:
-                if line.strip():
-                    n, p, s = line.strip().split("|")
-                    self.menu[n] = [float(p), int(s)]
-
-    def save_menu(self):
-        with open(MENU_FILE, "w") as f:
-            for k, v in self.menu.items():
-                f.write(f"{k}|{v[0]}|{v[1]}\n")
+        self.menu.update(self.stock.load_menu())
+        self.menu_index = MenuIndex(self.menu)
+
+    def save_menu(self, *items):
+        # Only the given items are written, each save is its own transaction
+        self.stock.save_items((k, self.menu[k][0], self.menu[k][1]) for k in items)
 
     # ================= ORDER TAB =================
 
@@ -82,77 +101,129 @@ class RestaurantManagementSystem:
 
         ttk.Button(self.order_tab, text="Calculate Total", command=self.calculate_total, width=18).grid(row=2, column=0, pady=5, padx=5)
         ttk.Button(self.order_tab, text="Place Order", command=self.place_order, width=18).grid(row=2, column=1, pady=5, padx=5)
-        ttk.Button(self.order_tab, text="Clear", command=self.refresh_tree, width=18).grid(row=2, column=2, pady=5, padx=5)
+        ttk.Button(self.order_tab, text="Clear", command=self.clear_order, width=18).grid(row=2, column=2, pady=5, padx=5)
+
+        search_frame = ttk.Frame(self.order_tab)
+        search_frame.grid(row=2, column=3, pady=5, padx=5)
+        ttk.Label(search_frame, text="Search", font=("Arial", 12, "bold")).pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.filter_menu())
+        ttk.Entry(search_frame, textvariable=self.search_var, width=15, font=("Arial", 12)).pack(side=tk.LEFT, padx=5)
+
+        # A single editor is moved onto whichever Qty cell is clicked
+        self.qty_editor = ttk.Spinbox(self.tree, from_=0, to=99, width=5, font=("Arial", 10))
+        self.qty_editor_item = None
+        self.qty_editor.bind("<Return>", self.commit_qty_editor)
+        self.qty_editor.bind("<FocusOut>", self.commit_qty_editor)
+        self.qty_editor.bind("<Escape>", lambda e: self.close_qty_editor())
+        self.tree.bind("<Button-1>", self.open_qty_editor)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(seq, self.commit_qty_editor)
 
         self.refresh_tree()
 
-    def refresh_tree(self):
-        for w in self.qty_widgets.values():
-            w.destroy()
-        self.qty_widgets.clear()
-        self.qty_vars.clear()
-
-        for r in self.tree.get_children():
-            self.tree.delete(r)
+    def refresh_tree(self, items=None):
+        # Rows are diffed against what is on screen; unchanged rows are not touched
+        if items is None:
+            items = self.menu
+            for item in self.tree_rows.keys() - self.menu.keys():
+                self.tree.delete(item)
+                del self.tree_rows[item]
+                self.qty.pop(item, None)
+
+        for item in items:
+            price, stock = self.menu[item]
+            values = (item, price, stock, self.qty.get(item, ""))
+            shown = self.tree_rows.get(item)
+            if shown is None:
+                self.tree.insert("", tk.END, iid=item, values=values)
+            elif shown != values:
+                self.tree.item(item, values=values)
+            self.tree_rows[item] = values
+
+    def filter_menu(self):
+        self.commit_qty_editor()
+        matches = self.menu_index.search(self.search_var.get())
+        # Rows that don't match are detached, not deleted, so clearing the search is cheap
+        self.tree.set_children("", *(self.menu if matches is None else matches))
+
+    def clear_order(self):
+        self.close_qty_editor()
+        ordered = list(self.qty)
+        self.qty.clear()
+        self.refresh_tree(ordered)
+        self.total_label.config(text="Total: BDT 0.00")
 
-        for item, (price, stock) in self.menu.items():
-            self.tree.insert("", tk.END, iid=item, values=(item, price, stock, ""))
+    def open_qty_editor(self, event):
+        self.commit_qty_editor()
+        item = self.tree.identify_row(event.y)
+        if not item or self.tree.identify_column(event.x) != "#4":
+            return
+        box = self.tree.bbox(item, "#4")
+        if not box:
+            return
+        x, y, w, h = box
+        self.qty_editor_item = item
+        self.qty_editor.set(self.qty.get(item, 0))
+        self.qty_editor.place(x=x+2, y=y+2, width=w-4, height=h-4)
+        self.qty_editor.focus_set()
+        self.qty_editor.selection_range(0, tk.END)
+
+    def commit_qty_editor(self, event=None):
+        item = self.qty_editor_item
+        if item is None:
+            return
+        try:
+            qty = max(0, int(self.qty_editor.get() or 0))
+        except ValueError:
+            qty = self.qty.get(item, 0)
+        self.close_qty_editor()
 
-        self.root.after(100, self.attach_qty_inputs)
-        self.total_label.config(text="Total: BDT 0.00")
+        if qty:
+            self.qty[item] = qty
+        else:
+            self.qty.pop(item, None)
+        if item in self.menu:
+            self.refresh_tree([item])
 
-    def attach_qty_inputs(self):
-        for item in self.menu:
-            if item in self.qty_widgets:
-                continue
-            box = self.tree.bbox(item, "#4")
-            if not box:
-                self.root.after(50, self.attach_qty_inputs)
-                return
-            x, y, w, h = box
-            var = tk.IntVar(value=0)
-            spin = ttk.Spinbox(self.tree, from_=0, to=99, textvariable=var, width=5, font=("Arial", 10))
-            spin.place(x=x+2, y=y+2, width=w-4, height=h-4)
-            self.qty_vars[item] = var
-            self.qty_widgets[item] = spin
+    def close_qty_editor(self):
+        self.qty_editor_item = None
+        self.qty_editor.place_forget()
 
     def calculate_total(self):
+        self.commit_qty_editor()
         total = 0
-        for item, var in self.qty_vars.items():
-            total += var.get() * self.menu[item][0]
+        for item, qty in self.qty.items():
+            total += qty * self.menu[item][0]
         self.total_label.config(text=f"Total: BDT {total:.2f}")
 
     def place_order(self):
-        if not self.customer_name.get() or not self.customer_phone.get():
-            messagebox.showerror("Error", "Customer details required")
+        self.commit_qty_editor()
+        try:
+            records, total = build_order(self.menu, self.customer_name.get(), self.customer_phone.get(), self.qty)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
             return
 
-        today = date.today().isoformat()
-        records = []
-        total = 0
-
-        for item, var in self.qty_vars.items():
-            qty = var.get()
-            if qty > 0:
-                if qty > self.menu[item][1]:
-                    messagebox.showerror("Error", f"Insufficient stock: {item}")
-                    return
-                price = self.menu[item][0]
-                cost = qty * price
-                self.menu[item][1] -= qty
-                total += cost
-                records.append((today, self.customer_name.get(), self.customer_phone.get(), item, qty, price, cost))
-
-        if not records:
-            messagebox.showerror("Error", "No items selected")
+        # Sales rows and stock decrements are written in one transaction
+        try:
+            self.stock.commit_order(records)
+        except ValueError as e:
+            self.load_menu()
+            self.refresh_tree()
+            self.filter_menu()
+            messagebox.showerror("Error", str(e))
+            return
+        except OSError as e:
+            # The stock server is down or went away; nothing was committed
+            messagebox.showerror("Error", f"Stock server unavailable: {e}")
             return
 
-        with open(SALES_FILE, "a") as f:
-            for r in records:
-                f.write("|".join(map(str, r)) + "\n")
+        for r in records:
+            self.menu[r[3]][1] -= r[4]
 
-        self.save_menu()
-        self.refresh_tree()
+        # The ordered rows are exactly the ones whose stock changed
+        self.clear_order()
         self.load_sales()
         messagebox.showinfo("Success", f"Total Bill: BDT {total:.2f}")
 
@@ -180,9 +251,10 @@ class RestaurantManagementSystem:
         ttk.Label(self.item_tab, text="Update Existing Item", font=("Arial", 14, "bold"), foreground="#004080").grid(row=6, column=0, sticky="w")
 
         ttk.Label(self.item_tab, text="Select Item", font=("Arial", 12, "bold")).grid(row=7, column=0, sticky="w")
-        self.item_select = ttk.Combobox(self.item_tab, values=list(self.menu.keys()), state="readonly", font=("Arial", 12))
+        self.item_select = ttk.Combobox(self.item_tab, values=list(self.menu.keys()), font=("Arial", 12))
         self.item_select.grid(row=7, column=1, padx=5)
         self.item_select.bind("<<ComboboxSelected>>", self.load_item_data)
+        self.item_select.bind("<KeyRelease>", self.filter_item_select)
 
         ttk.Label(self.item_tab, text="Price", font=("Arial", 12, "bold")).grid(row=8, column=0, sticky="w")
         ttk.Label(self.item_tab, text="Stock", font=("Arial", 12, "bold")).grid(row=9, column=0, sticky="w")
@@ -209,9 +281,11 @@ class RestaurantManagementSystem:
             stock = int(self.new_stock.get())
 
             self.menu[name] = [price, stock]
-            self.save_menu()
-            self.refresh_tree()
-            self.item_select["values"] = list(self.menu.keys())
+            self.save_menu(name)
+            self.menu_index.add(name)
+            self.refresh_tree([name])
+            self.filter_menu()
+            self.filter_item_select()
 
             # Clear the input fields
             self.new_name.delete(0, tk.END)
@@ -226,6 +300,10 @@ class RestaurantManagementSystem:
             messagebox.showerror("Error", f"Something went wrong: {e}")
 
 
+    def filter_item_select(self, event=None):
+        matches = self.menu_index.search(self.item_select.get(), limit=SEARCH_LIMIT)
+        self.item_select["values"] = list(self.menu) if matches is None else matches
+
     def load_item_data(self, event):
         item = self.item_select.get()
         price, stock = self.menu[item]
@@ -237,7 +315,7 @@ class RestaurantManagementSystem:
     def update_item(self):
         try:
             item = self.item_select.get()
-            if not item:
+            if item not in self.menu:
                 messagebox.showerror("Error", "No item selected")
                 return
 
@@ -246,8 +324,8 @@ class RestaurantManagementSystem:
             if self.up_stock.get():
                 self.menu[item][1] = int(self.up_stock.get())
 
-            self.save_menu()
-            self.refresh_tree()
+            self.save_menu(item)
+            self.refresh_tree([item])
 
             messagebox.showinfo("Success", f"Item '{item}' updated successfully!")
 
@@ -260,7 +338,7 @@ class RestaurantManagementSystem:
     def build_sales_tab(self):
         style = ttk.Style()
         style.configure("Sales.Treeview.Heading", font=("Arial", 12, "bold"), foreground="#004080")
-        style.configure("Sales.Treeview", font=("Arial", 11), rowheight=25)
+        style.configure("Sales.Treeview", font=("Arial", 11), rowheight=SALES_ROW_HEIGHT)
 
         columns = ("Date", "Customer", "Phone", "Item", "Qty", "Price", "Total")
         self.sales_tree = ttk.Treeview(self.sales_tab, columns=columns, show="headings", height=20, style="Sales.Treeview")
@@ -268,31 +346,139 @@ class RestaurantManagementSystem:
             self.sales_tree.heading(col, text=col)
             self.sales_tree.column(col, anchor="center", width=100)
 
+        self.sales_summary = tk.Label(self.sales_tab, font=("Arial", 12, "bold"), fg="#004080", bg="#f0f4f8")
+        self.sales_summary.pack(side=tk.BOTTOM, fill=tk.X, padx=10)
+        # Built the first time the tab is shown, so startup never scans the sales log
+        self.report = None
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+        # The tree only ever holds the rows on screen; this scrollbar spans the whole log
+        self.sales_scroll = ttk.Scrollbar(self.sales_tab, orient=tk.VERTICAL, command=self.scroll_sales)
+        self.sales_scroll.pack(side=tk.RIGHT, fill=tk.Y, pady=10)
         self.sales_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        self.sales_tree.tag_configure("evenrow", background="#f0f4f8")
+        self.sales_tree.tag_configure("oddrow", background="#ffffff")
+
+        self.sales_tree.bind("<Configure>", self.resize_sales)
+        # Step by the wheel's direction; macOS sends deltas far smaller than 120
+        self.sales_tree.bind("<MouseWheel>", lambda e: self.scroll_sales("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.sales_tree.bind("<Button-4>", lambda e: self.scroll_sales("scroll", -1, "units"))
+        self.sales_tree.bind("<Button-5>", lambda e: self.scroll_sales("scroll", 1, "units"))
         self.load_sales()
 
     def load_sales(self):
-        for row in self.sales_tree.get_children():
-            self.sales_tree.delete(row)
-
-        if os.path.exists(SALES_FILE):
-            with open(SALES_FILE) as f:
-                for line in f:
-                    if line.strip():
-                        today, name, phone, item, qty, price, cost = line.strip().split("|")
-                        self.sales_tree.insert("", tk.END, values=(today, name, phone, item, qty, price, cost))
-
-        # Optional: alternate row colors for readability
-        for i, row in enumerate(self.sales_tree.get_children()):
-            if i % 2 == 0:
-                self.sales_tree.item(row, tags=("evenrow",))
-            else:
-                self.sales_tree.item(row, tags=("oddrow",))
+        at_end = self.sales_offset + self.sales_visible >= self.sales_total
+        self.sales_total = self.store.count()
+        self.sales_cache = []
+        if at_end:
+            self.sales_offset = self.sales_total - self.sales_visible
+        self.show_sales(self.sales_offset)
+        self.show_sales_summary()
+
+    def on_tab_changed(self, event):
+        if self.report is None and self.notebook.select() == str(self.sales_tab):
+            self.report = SalesReport(self.store)
+            self.show_sales_summary()
+
+    def show_sales_summary(self):
+        if self.report is None:
+            return
+        self.report.refresh()
+        today = date.today().isoformat()
+        revenue = sum(r for _, r in self.report.revenue_by_day(today, today))
+        top = self.report.top_items(1, start=today, end=today)
+        best = top[0][0] if top else "-"
+        self.sales_summary.config(text=f"Today: BDT {revenue:.2f}    Best Seller: {best}")
+
+    def sales_rows_at(self, offset, count):
+        # Serve from the cached page, fetching a new page around offset on a miss
+        start = offset - self.sales_cache_start
+        if start < 0 or start + count > len(self.sales_cache):
+            self.sales_cache_start = max(0, offset - SALES_PAGE // 2)
+            after_id = self.store.id_before(self.sales_cache_start, self.sales_total)
+            self.sales_cache = self.store.page(after_id, SALES_PAGE)
+            start = offset - self.sales_cache_start
+        return self.sales_cache[start:start + count]
+
+    def show_sales(self, offset):
+        offset = max(0, min(offset, self.sales_total - self.sales_visible))
+        self.sales_offset = offset
+
+        self.sales_tree.delete(*self.sales_tree.get_children())
+        count = min(self.sales_visible, self.sales_total - offset)
+        for i, (row_id, *values) in enumerate(self.sales_rows_at(offset, count)):
+            tag = "evenrow" if (offset + i) % 2 == 0 else "oddrow"
+            self.sales_tree.insert("", tk.END, values=values, tags=(tag,))
+
+        if self.sales_total:
+            self.sales_scroll.set(offset / self.sales_total, (offset + self.sales_visible) / self.sales_total)
+        else:
+            self.sales_scroll.set(0, 1)
+
+    def scroll_sales(self, action, amount, unit=None):
+        if action == "moveto":
+            offset = int(float(amount) * self.sales_total)
+        elif unit == "pages":
+            offset = self.sales_offset + int(amount) * self.sales_visible
+        else:
+            offset = self.sales_offset + int(amount)
+        self.show_sales(offset)
+
+    def resize_sales(self, event):
+        # One row's worth of height is taken by the headings
+        visible = max(1, event.height // SALES_ROW_HEIGHT - 1)
+        if visible != self.sales_visible:
+            self.sales_visible = visible
+            self.show_sales(self.sales_offset)
+
+def bench_refresh(sizes=(100, 1000, 5000, 10000)):
+    """Time the order table's first render, a no-op refresh and a post-order refresh."""
+    root = tk.Tk()
+    root.withdraw()
+    print(f"{'Items':>8} {'First render':>14} {'No-op refresh':>15} {'After order':>13}")
+
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            store = RestaurantStore(path)
+            store.save_items((f"Item {i}", 100.0, 1000) for i in range(n))
+            store.close()
+
+            window = tk.Toplevel(root)
+            app = RestaurantManagementSystem(window, path, standalone=True)
+            app.tree.delete(*app.tree.get_children())
+            app.tree_rows.clear()
+
+            start = time.perf_counter()
+            app.refresh_tree()
+            window.update_idletasks()
+            first = time.perf_counter() - start
+
+            start = time.perf_counter()
+            app.refresh_tree()
+            window.update_idletasks()
+            noop = time.perf_counter() - start
+
+            for item in list(app.menu)[:3]:
+                app.qty[item] = 2
+                app.menu[item][1] -= 2
+            start = time.perf_counter()
+            app.clear_order()
+            window.update_idletasks()
+            order = time.perf_counter() - start
+
+            print(f"{n:>8} {first * 1000:>11.2f} ms {noop * 1000:>12.2f} ms {order * 1000:>10.2f} ms")
+            window.destroy()
+            app.store.close()
+
+    root.destroy()
 
-        self.sales_tree.tag_configure("evenrow", background="#f0f4f8")
-        self.sales_tree.tag_configure("oddrow", background="#ffffff")
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    RestaurantManagementSystem(root)
-    root.mainloop()
+    if "--bench-refresh" in sys.argv:
+        bench_refresh()
+    else:
+        root = tk.Tk()
+        RestaurantManagementSystem(root)
+        root.mainloop()
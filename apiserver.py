@@ -0,0 +1,312 @@
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import parse_qs
+
+import sentimentspy
+import textclass
+from menuindex import MenuIndex
+from predcache import PredictionCache, normalize
+from salesreport import SalesReport
+from store import DB_FILE, RestaurantStore, build_order
+from webapp import (HOST, PORT, USERS_DB, EventStream, HttpError, Response, WebApp, hammer,
+                    print_latencies, signup_cookie, start_in_thread, stop_thread)
+
+MAX_TEXT = 5000
+SEARCH_LIMIT = 50
+TOP_ITEMS = 10
+SYNC_INTERVAL = 2
+
+
+class ApiServer(WebApp):
+    """The login backend plus a JSON API over the restaurant, intent and sentiment code.
+
+    The menu and sales reports are kept in memory and only rebuilt when an
+    order changes them, whether it came through this server or was
+    committed by another program on the same database (the tills, the
+    stock server); the intent model and sentiment backend are loaded
+    once.  The store and the models each get a single-thread executor, so
+    the SQLite connection stays on the thread that opened it and neither
+    prediction cache is shared between threads.  Placed orders are pushed
+    to the dashboard as server-sent events.
+    """
+
+    def __init__(self, host=HOST, port=PORT, db=USERS_DB, restaurant_db=DB_FILE, backend="textblob"):
+        super().__init__(host, port, db)
+        self.store_thread = ThreadPoolExecutor(max_workers=1)
+        self.model_thread = ThreadPoolExecutor(max_workers=1)
+        self.store_thread.submit(self.open_store, restaurant_db).result()
+        self.model_thread.submit(self.load_models, backend).result()
+        self.menu_body = None
+        self.orders = EventStream()
+        self.routes.update({
+            ("GET", "/api/menu"): self.get_menu,
+            ("GET", "/api/sales"): self.get_sales,
+            ("POST", "/api/orders"): self.post_order,
+            ("GET", "/api/orders/live"): self.live_orders,
+            ("POST", "/api/intent"): self.intent,
+            ("POST", "/api/sentiment"): self.sentiment,
+        })
+
+    async def start(self):
+        server = await super().start()
+        self.poller = asyncio.create_task(self.poll())
+        return server
+
+    async def stop(self):
+        self.poller.cancel()
+        await super().stop()
+        self.store_thread.submit(self.store.close).result()
+        self.store_thread.shutdown()
+        self.model_thread.shutdown()
+
+    # ---------------- runs on store_thread ----------------
+
+    def open_store(self, path):
+        self.store = RestaurantStore(path)
+        self.menu = self.store.load_menu()
+        self.menu_index = MenuIndex(self.menu)
+        self.report = SalesReport(self.store)
+        self.sales_cache = {}
+        self.seen_version = self.store.data_version()
+
+    def sync(self):
+        """Pick up commits made by other connections since the last call.
+
+        Returns (menu_changed, totals); totals is None unless new sales
+        came in.  Commits on this connection do not change the data
+        version, so orders placed here are not counted twice.
+        """
+        version = self.store.data_version()
+        if version == self.seen_version:
+            return False, None
+        self.seen_version = version
+        menu = self.store.load_menu()
+        menu_changed = menu != self.menu
+        if menu_changed:
+            self.menu = menu
+            self.menu_index = MenuIndex(menu)
+        if not self.report.refresh():
+            return menu_changed, None
+        self.sales_cache.clear()
+        return menu_changed, self.totals()
+
+    def menu_json(self, names=None):
+        names = self.menu if names is None else names
+        items = [{"name": n, "price": self.menu[n][0], "stock": self.menu[n][1]} for n in names]
+        return json.dumps({"ok": True, "items": items}).encode()
+
+    def sales_json(self, start, end, top):
+        key = (start, end, top)
+        if key not in self.sales_cache:
+            self.sales_cache[key] = json.dumps({
+                "ok": True,
+                "by_day": self.report.revenue_by_day(start, end),
+                "top_items": self.report.top_items(top, start=start, end=end),
+            }).encode()
+        return self.sales_cache[key]
+
+    def place_order(self, customer, phone, quantities):
+        records, total = build_order(self.menu, customer, phone, quantities)
+        try:
+            self.store.commit_order(records)
+        except ValueError:
+            # Another till sold the stock first; start again from the database
+            self.menu = self.store.load_menu()
+            raise
+        for r in records:
+            self.menu[r[3]][1] -= r[4]
+        self.report.refresh()
+        self.sales_cache.clear()
+        return total, self.totals({"customer": customer, "total": total, "items": len(records)})
+
+    def totals(self, last=None):
+        """Today's live order totals, as sent to the dashboard."""
+        today = date.today().isoformat()
+        sold = self.report.revenue_by_item(today, today).values()
+        return {
+            "date": today,
+            "items": sum(qty for qty, _ in sold),
+            "revenue": round(sum(revenue for _, revenue in sold), 2),
+            "last": last,
+        }
+
+    # ---------------- runs on model_thread ----------------
+
+    def load_models(self, backend):
+        self.vectorizer, self.model = textclass.load_model()
+        self.intent_cache = PredictionCache(version=textclass.model_version(), normalize=normalize)
+        self.backend = sentimentspy.get_backend(backend)
+        self.sentiment_cache = PredictionCache(version=self.backend.version)
+
+    def classify_intent(self, text):
+        label, confidence = textclass.analyze(text, self.vectorizer, self.model, self.intent_cache)
+        return {"ok": True, "label": str(label), "confidence": float(confidence)}
+
+    def score_sentiment(self, text):
+        label, polarity, confidence, _ = sentimentspy.analyze(text, self.sentiment_cache, self.backend)
+        return {"ok": True, "label": label, "polarity": polarity, "confidence": confidence}
+
+    # ---------------- routes ----------------
+
+    async def catch_up(self):
+        menu_changed, totals = await self.run(self.store_thread, self.sync)
+        if menu_changed:
+            self.menu_body = None
+        if totals is not None:
+            self.orders.publish("order", totals)
+
+    async def poll(self):
+        """Push sales made elsewhere to the dashboard even when nobody asks."""
+        while True:
+            await asyncio.sleep(SYNC_INTERVAL)
+            try:
+                await self.catch_up()
+            except sqlite3.Error as e:
+                print(f"Could not check the database for changes: {e}", file=sys.stderr)
+
+    def require_user(self, request):
+        user = self.current_user(request)
+        if user is None:
+            raise HttpError(401, "Not logged in")
+        return user
+
+    @staticmethod
+    def text_of(request):
+        text = str(request.json().get("text", "")).strip()
+        if not text:
+            raise HttpError(400, "Text cannot be empty")
+        if len(text) > MAX_TEXT:
+            raise HttpError(400, f"Text is longer than {MAX_TEXT} characters")
+        return text
+
+    async def get_menu(self, request):
+        self.require_user(request)
+        await self.catch_up()
+        query = parse_qs(request.query).get("q", [""])[0]
+        if query.strip():
+            names = self.menu_index.search(query, SEARCH_LIMIT)
+            return Response(200, await self.run(self.store_thread, self.menu_json, names))
+        if self.menu_body is None:
+            self.menu_body = await self.run(self.store_thread, self.menu_json)
+        return Response(200, self.menu_body)
+
+    async def get_sales(self, request):
+        self.require_user(request)
+        await self.catch_up()
+        args = parse_qs(request.query)
+        try:
+            top = int(args.get("top", [TOP_ITEMS])[0])
+        except ValueError:
+            raise HttpError(400, "top must be a number") from None
+        start, end = args.get("from", [None])[0], args.get("to", [None])[0]
+        return Response(200, await self.run(self.store_thread, self.sales_json, start, end, top))
+
+    async def post_order(self, request):
+        self.require_user(request)
+        data = request.json()
+        items = data.get("items")
+        try:
+            quantities = {str(name): int(qty) for name, qty in items.items()}
+        except (AttributeError, TypeError, ValueError):
+            raise HttpError(400, "items must map item names to quantities") from None
+        customer = str(data.get("customer", "")).strip()
+        phone = str(data.get("phone", "")).strip()
+        try:
+            total, totals = await self.run(self.store_thread, self.place_order, customer, phone, quantities)
+        except ValueError as e:
+            self.menu_body = None
+            raise HttpError(409 if str(e).startswith("Insufficient") else 400, str(e)) from None
+        self.menu_body = None
+        self.orders.publish("order", totals)
+        return Response.json({"ok": True, "total": total}, 201)
+
+    async def live_orders(self, request):
+        self.require_user(request)
+        await self.catch_up()
+        totals = await self.run(self.store_thread, self.totals)
+        return self.orders.subscribe(("order", totals))
+
+    async def intent(self, request):
+        self.require_user(request)
+        return Response.json(await self.run(self.model_thread, self.classify_intent, self.text_of(request)))
+
+    async def sentiment(self, request):
+        self.require_user(request)
+        return Response.json(await self.run(self.model_thread, self.score_sentiment, self.text_of(request)))
+
+
+# ================= LOAD TEST =================
+
+def listen(port, cookie, received):
+    """Collect the order events an SSE client sees until the server closes the stream."""
+    conn = http.client.HTTPConnection(HOST, port)
+    conn.request("GET", "/api/orders/live", headers={"Cookie": cookie})
+    response = conn.getresponse()
+    for line in response.fp:
+        if line.startswith(b"event: order"):
+            received.append(line)
+    conn.close()
+
+
+def load_test(clients, seconds, items=50, backend="textblob"):
+    """Menu, sales, order and model traffic against an in-process server with a fresh database."""
+    tmp = tempfile.TemporaryDirectory()
+    restaurant_db = os.path.join(tmp.name, "restaurant.db")
+    store = RestaurantStore(restaurant_db)
+    store.save_items((f"Item {i}", 100.0 + i, 10 ** 9) for i in range(items))
+    store.close()
+
+    app = ApiServer(port=0, db=os.path.join(tmp.name, "users.db"), restaurant_db=restaurant_db, backend=backend)
+    loop, port = start_in_thread(app)
+    cookie = signup_cookie(port)
+    received = []
+    listener = threading.Thread(target=listen, args=(port, cookie, received))
+    listener.start()
+
+    get = {"Cookie": cookie}
+    post = {"Content-Type": "application/json", "Cookie": cookie}
+    texts = [json.dumps({"text": text}) for text, _ in textclass.TRAINING_DATA]
+    orders = [
+        json.dumps({"customer": f"Customer {n}", "phone": f"0170000{n:04}",
+                    "items": {f"Item {n % items}": 1, f"Item {(n * 7) % items}": 2}})
+        for n in range(100)
+    ]
+    mix = [("GET /api/menu", 30, "GET", "/api/menu", None, get)]
+    mix += [("GET /api/menu?q=", 4, "GET", f"/api/menu?q=item%20{n}", None, get) for n in range(5)]
+    mix += [("GET /api/sales", 20, "GET", "/api/sales", None, get)]
+    mix += [("POST /api/intent", 1, "POST", "/api/intent", body, post) for body in texts[:20]]
+    mix += [("POST /api/sentiment", 1, "POST", "/api/sentiment", body, post) for body in texts[:20]]
+    mix += [("POST /api/orders", 0.1, "POST", "/api/orders", body, post) for body in orders]
+    latencies, elapsed = hammer(port, mix, clients, seconds)
+
+    stop_thread(app, loop)
+    listener.join()
+    tmp.cleanup()
+    print_latencies(latencies, clients, elapsed)
+    print(f"Live events: {len(received) - 1} of {len(latencies['POST /api/orders'])} orders reached the dashboard stream")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON API for the dashboard: ordering, sales, intent and sentiment")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--db", default=USERS_DB)
+    parser.add_argument("--restaurant-db", default=DB_FILE)
+    parser.add_argument("--backend", choices=sentimentspy.BACKENDS, default="textblob")
+    parser.add_argument("--loadtest", type=int, metavar="CLIENTS", help="simulate CLIENTS concurrent clients and exit")
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    if args.loadtest:
+        load_test(args.loadtest, args.seconds, backend=args.backend)
+    else:
+        asyncio.run(ApiServer(args.host, args.port, args.db, args.restaurant_db, args.backend).serve_forever())
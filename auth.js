@@ -0,0 +1,105 @@
+async function api(path, body) {
+    const options = body === undefined
+        ? { credentials: "same-origin" }
+        : {
+            method: "POST",
+            credentials: "same-origin",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify(body)
+        };
+    const res = await fetch(path, options);
+    const data = await res.json().catch(() => ({ ok: false, error: "Server error" }));
+    return { status: res.status, ...data };
+}
+
+function $(id) {
+    return document.getElementById(id);
+}
+
+function togglePassword(iconId, inputId) {
+    const icon = $(iconId);
+    if (!icon) return;
+    icon.addEventListener("click", () => {
+        const input = $(inputId);
+        const hidden = input.type === "password";
+        input.type = hidden ? "text" : "password";
+        icon.classList.toggle("fa-eye", !hidden);
+        icon.classList.toggle("fa-eye-slash", hidden);
+    });
+}
+
+if ($("loginBtn")) {
+    togglePassword("loginToggle", "loginPassword");
+    $("loginBtn").addEventListener("click", async () => {
+        const res = await api("/api/login", {
+            email: $("loginEmail").value,
+            password: $("loginPassword").value
+        });
+        if (!res.ok) return showToast(res.error);
+        showToast("Welcome back, " + res.user.name, "success");
+        setTimeout(() => location.href = "dashboard.html", 600);
+    });
+}
+
+if ($("signupBtn")) {
+    togglePassword("signupToggle", "password");
+    $("signupBtn").addEventListener("click", async () => {
+        const res = await api("/api/signup", {
+            name: $("name").value,
+            email: $("email").value,
+            password: $("password").value
+        });
+        if (!res.ok) return showToast(res.error);
+        showToast("Account created", "success");
+        setTimeout(() => location.href = "dashboard.html", 600);
+    });
+}
+
+if ($("logoutBtn")) {
+    api("/api/me").then(res => {
+        if (!res.ok) return location.href = "index.html";
+        $("userName").innerText = res.user.name;
+        $("userEmail").innerText = res.user.email;
+        if (res.live) watchOrders();
+    });
+
+    // Live order totals, pushed by apiserver.py; plain webapp.py has no
+    // stream (/api/me says so) and the boxes keep their placeholders
+    let orders = null;
+    let retryMs = 1000;
+    function watchOrders() {
+        orders = new EventSource("/api/orders/live");
+        orders.addEventListener("order", event => {
+            const totals = JSON.parse(event.data);
+            $("revenueToday").innerText = "BDT " + totals.revenue.toFixed(2);
+            $("itemsToday").innerText = totals.items;
+            if (totals.last) {
+                $("lastOrder").innerText = `${totals.last.customer}, BDT ${totals.last.total.toFixed(2)}`;
+            }
+        });
+        orders.addEventListener("open", () => retryMs = 1000);
+        // The browser reconnects dropped streams itself, but gives up for good
+        // once a reconnect is refused (say, during a restart); reopen it then,
+        // backing off up to 30 s
+        orders.onerror = () => {
+            if (orders.readyState !== EventSource.CLOSED) return;
+            setTimeout(watchOrders, retryMs);
+            retryMs = Math.min(retryMs * 2, 30000);
+        };
+    }
+
+    $("logoutBtn").addEventListener("click", async () => {
+        if (orders) orders.close();
+        await api("/api/logout", {});
+        location.href = "index.html";
+    });
+
+    $("changePassBtn").addEventListener("click", async () => {
+        const password = $("newPassword").value;
+        if (password !== $("confirmPassword").value) return showToast("Passwords do not match");
+        const res = await api("/api/password", { password });
+        if (!res.ok) return showToast(res.error);
+        $("newPassword").value = $("confirmPassword").value = "";
+        showToast("Password updated", "success");
+    });
+}
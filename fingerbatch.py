@@ -0,0 +1,185 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from importlib.util import find_spec
+
+import cv2
+
+from fingercount import count_fingers, make_hands
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+LANDMARKS = 21
+COLUMNS = ["frame", "source", "finger_count", "hands"] + [
+    f"{axis}{i}" for i in range(LANDMARKS) for axis in "xyz"
+]
+
+
+def read_frames(path):
+    """Yield (name, BGR frame) from a video file or a directory of images."""
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                frame = cv2.imread(os.path.join(path, name))
+                if frame is not None:
+                    yield name, frame
+        return
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open {path}")
+    try:
+        index = 0
+        while True:
+            success, frame = cap.read()
+            if not success:
+                break
+            yield str(index), frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def frame_row(index, name, result, finger_count):
+    hands = result.multi_hand_landmarks or []
+    row = [index, name, finger_count, len(hands)]
+    if hands:
+        for p in hands[0].landmark:
+            row += [round(p.x, 5), round(p.y, 5), round(p.z, 5)]
+    else:
+        row += [None] * (LANDMARKS * 3)
+    return row
+
+
+def write_rows(out, fmt, rows):
+    """Write rows to out and return how many there were."""
+    if fmt == "csv":
+        n = 0
+        with open(out, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for row in rows:
+                writer.writerow(row)
+                n += 1
+        return n
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = list(zip(*rows)) or [[] for _ in COLUMNS]
+    pq.write_table(pa.table(dict(zip(COLUMNS, map(list, columns)))), out)
+    return len(columns[0])
+
+
+def read_counts(path, fmt):
+    if fmt == "csv":
+        with open(path, newline="") as f:
+            return [int(row["finger_count"]) for row in csv.DictReader(f)]
+    import pyarrow.parquet as pq
+    return pq.read_table(path, columns=["finger_count"]).column(0).to_pylist()
+
+
+def output_names(paths, fmt):
+    """Map each input to its output file name.
+
+    Inputs are named after their base name; when two inputs share one (say
+    day1/clip.mp4 and day2/clip.mp4) both are named after their relative
+    path instead, so neither overwrites the other.
+    """
+    names = {p: os.path.splitext(os.path.basename(os.path.normpath(p)))[0] for p in paths}
+    clashes = Counter(names.values())
+    for p, name in names.items():
+        if clashes[name] > 1:
+            names[p] = os.path.relpath(os.path.normpath(p)).replace(os.sep, "_")
+    clashes = Counter(names.values())
+    seen = Counter()
+    for p, name in names.items():
+        if clashes[name] > 1:
+            seen[name] += 1
+            names[p] = f"{name}-{seen[name]}"
+    return {p: f"{name}.{fmt}" for p, name in names.items()}
+
+
+def positive_int(value):
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {n}")
+    return n
+
+
+def process_input(path, out, fmt="csv", flip=True):
+    """Count fingers in every frame of one input; returns (frames, seconds)."""
+    start = time.perf_counter()
+    # Image directories are unrelated stills, so track nothing between them
+    with make_hands(static_image_mode=os.path.isdir(path)) as hands:
+        def rows():
+            for i, (name, frame) in enumerate(read_frames(path)):
+                if flip:
+                    frame = cv2.flip(frame, 1)
+                result = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                yield frame_row(i, name, result, count_fingers(result))
+
+        frames = write_rows(out, fmt, rows())
+    return frames, time.perf_counter() - start
+
+
+def compare(baseline, out, fmt):
+    """Number of frames whose finger count differs from the baseline file."""
+    old, new = read_counts(baseline, fmt), read_counts(out, fmt)
+    return sum(a != b for a, b in zip(old, new)) + abs(len(old) - len(new))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count fingers in recorded videos or image directories, headless")
+    parser.add_argument("inputs", nargs="+", help="video files and/or directories of images")
+    parser.add_argument("-o", "--output-dir", default="fingercount_out")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--workers", type=positive_int, default=os.cpu_count() or 1)
+    parser.add_argument("--no-flip", action="store_true", help="do not mirror frames like the live camera view")
+    parser.add_argument("--baseline", metavar="DIR", help="compare finger counts with an earlier output directory")
+    args = parser.parse_args(argv)
+    if args.format == "parquet" and find_spec("pyarrow") is None:
+        parser.error("--format parquet needs pyarrow installed")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    names = output_names(dict.fromkeys(args.inputs), args.format)
+    jobs = {path: os.path.join(args.output_dir, name) for path, name in names.items()}
+    failed = False
+    total_frames = 0
+    begin = time.perf_counter()
+
+    with ProcessPoolExecutor(min(args.workers, len(jobs))) as pool:
+        futures = {
+            pool.submit(process_input, path, out, args.format, not args.no_flip): path
+            for path, out in jobs.items()
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                frames, seconds = future.result()
+            except ValueError as e:
+                print(f"{path}: {e}", file=sys.stderr)
+                failed = True
+                continue
+            total_frames += frames
+            line = f"{path}: {frames} frames, {frames / max(seconds, 1e-9):.1f} fps"
+            if args.baseline:
+                baseline = os.path.join(args.baseline, names[path])
+                if os.path.exists(baseline):
+                    changed = compare(baseline, jobs[path], args.format)
+                    failed |= changed > 0
+                    line += f", {changed} frames differ from baseline"
+                else:
+                    line += ", no baseline"
+            print(line)
+
+    elapsed = time.perf_counter() - begin
+    print(f"Total: {total_frames} frames in {elapsed:.1f} s, {total_frames / max(elapsed, 1e-9):.1f} fps")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
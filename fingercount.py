@@ -1,47 +1,283 @@
+import argparse
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from types import SimpleNamespace
+
 import cv2
 import mediapipe as mp
+import numpy as np
 
 mp_hands = mp.solutions.hands
 mp_draw = mp.solutions.drawing_utils
 
-hands = mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=1,
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.7
-)
-
 finger_tips = [4, 8, 12, 16, 20]
+MAX_HANDS = 1
+SMOOTH_FRAMES = 5
+ROI_SIZE = 256
+ROI_PADDING = 0.35
+
+WINDOW = "Hand Detection & Finger Count"
+STAGES = ("capture", "inference", "render", "latency")
+
+
+class LatestQueue:
+    """One-slot queue where a new item replaces one that was not taken yet.
+
+    A slow consumer always gets the freshest frame instead of working
+    through a backlog; replaced items are counted as dropped and passed to
+    on_drop.
+    """
+
+    def __init__(self, on_drop=None):
+        self.cond = threading.Condition()
+        self.item = None
+        self.full = False
+        self.closed = False
+        self.dropped = 0
+        self.on_drop = on_drop
+
+    def put(self, item):
+        with self.cond:
+            if self.full:
+                self.dropped += 1
+                if self.on_drop:
+                    self.on_drop(self.item)
+            self.item = item
+            self.full = True
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        """Next item, or None on timeout or once closed and empty."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.full or self.closed, timeout)
+            if not self.full:
+                return None
+            item, self.item, self.full = self.item, None, False
+            return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class StageTimes:
+    """Recent durations per pipeline stage."""
+
+    def __init__(self, window=1000):
+        self.samples = {stage: deque(maxlen=window) for stage in STAGES}
+
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+    def summary(self, stage):
+        samples = sorted(self.samples[stage])
+        if not samples:
+            return "no samples"
+        p99 = samples[min(int(len(samples) * 0.99), len(samples) - 1)]
+        return f"mean {statistics.fmean(samples) * 1000:6.2f} ms, p99 {p99 * 1000:6.2f} ms"
+
+
+class FrameBuffers:
+    """Reusable arrays for the mirrored BGR frame and its RGB copy.
+
+    The RGB frame never leaves the inference stage, so one is enough.
+    Mirrored frames go on to be drawn and shown; the render stage hands
+    them back with release(), and a new one is only allocated when none
+    is free or the frame size changed.
+    """
+
+    def __init__(self):
+        self.free = []
+        self.rgb = None
+        self.allocated = 0
+
+    def mirror(self, frame):
+        mirrored = self.free.pop() if self.free else None
+        if mirrored is None or mirrored.shape != frame.shape:
+            mirrored = np.empty_like(frame)
+            self.allocated += 1
+        if self.rgb is None or self.rgb.shape != frame.shape:
+            self.rgb = np.empty_like(frame)
+        cv2.flip(frame, 1, dst=mirrored)
+        cv2.cvtColor(mirrored, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        return mirrored, self.rgb
+
+    def release(self, mirrored):
+        self.free.append(mirrored)
+
+
+class SyntheticSource:
+    """Stand-in for cv2.VideoCapture that draws a moving blob at a fixed rate."""
+
+    def __init__(self, frames=300, width=640, height=480, fps=30):
+        self.frames = frames
+        self.width = width
+        self.height = height
+        self.interval = 1 / fps if fps else 0
+        self.count = 0
+        self.next_at = time.perf_counter()
+
+    def read(self):
+        if self.count >= self.frames:
+            return False, None
+        delay = self.next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_at = max(self.next_at, time.perf_counter()) + self.interval
+
+        frame = np.full((self.height, self.width, 3), 40, dtype=np.uint8)
+        x = int((self.count * 7) % self.width)
+        cv2.circle(frame, (x, self.height // 2), 60, (120, 160, 220), -1)
+        self.count += 1
+        return True, frame
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+def open_source(spec):
+    """A camera index, a video file path, or "synthetic[:FRAMES]"."""
+    if spec.startswith("synthetic"):
+        _, _, frames = spec.partition(":")
+        return SyntheticSource(int(frames or 300))
+    cap = cv2.VideoCapture(int(spec) if spec.isdigit() else spec)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open video source {spec!r}")
+    return cap
+
+
+def make_hands(static_image_mode=False, max_num_hands=MAX_HANDS):
+    return mp_hands.Hands(
+        static_image_mode=static_image_mode,
+        max_num_hands=max_num_hands,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.7
+    )
+
 
-cap = cv2.VideoCapture(0)
+def hand_points(result):
+    """(hands, 21, 2) array of landmark x/y."""
+    hands = result.multi_hand_landmarks or []
+    coords = (v for hand in hands for p in hand.landmark for v in (p.x, p.y))
+    return np.fromiter(coords, dtype=np.float64, count=len(hands) * 42).reshape(len(hands), 21, 2)
 
-while True:
-    success, frame = cap.read()
-    if not success:
-        break
 
-    frame = cv2.flip(frame, 1)
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    result = hands.process(rgb)
+def count_fingers(result):
+    """Raised fingers over every detected hand, read straight off the landmarks.
 
+    Frames are mirrored before detection, so MediaPipe's handedness labels
+    match the user's hands.  An open right thumb points to smaller x, a
+    left one to larger x; hands without a label are treated as right.
+    Only 12 of the 21 points are read, so a plain loop beats converting
+    them to arrays, even for many frames at once (see --bench-post).
+    """
     finger_count = 0
 
     if result.multi_hand_landmarks:
-        for hand_landmarks in result.multi_hand_landmarks:
+        labels = [h.classification[0].label for h in result.multi_handedness or []]
+        for i, hand_landmarks in enumerate(result.multi_hand_landmarks):
             lm = hand_landmarks.landmark
+            left = i < len(labels) and labels[i] == "Left"
 
-            if lm[finger_tips[0]].x < lm[finger_tips[0] - 1].x:
+            thumb = lm[finger_tips[0]].x - lm[finger_tips[0] - 1].x
+            if (thumb > 0) if left else (thumb < 0):
                 finger_count += 1
 
             for tip in finger_tips[1:]:
                 if lm[tip].y < lm[tip - 2].y:
                     finger_count += 1
 
-            mp_draw.draw_landmarks(
-                frame,
-                hand_landmarks,
-                mp_hands.HAND_CONNECTIONS
-            )
+    return finger_count
+
+
+def fit(image, size):
+    """image scaled down so its longest side is at most size (0 = as is)."""
+    h, w = image.shape[:2]
+    if size and max(h, w) > size:
+        scale = size / max(h, w)
+        return cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+    return np.ascontiguousarray(image)
+
+
+class RoiTracker:
+    """Runs the detector on a padded, downscaled crop around the last hands.
+
+    Landmarks found in the crop are mapped back to whole-frame
+    coordinates.  When the crop holds no hand, or there was none last
+    frame, the whole frame (optionally downscaled) is searched instead.
+    """
+
+    def __init__(self, hands, roi_size=ROI_SIZE, search_size=0, padding=ROI_PADDING):
+        self.hands = hands
+        self.roi_size = roi_size
+        self.search_size = search_size
+        self.padding = padding
+        self.box = None
+        self.roi_hits = 0
+        self.searches = 0
+
+    def process(self, rgb):
+        height, width = rgb.shape[:2]
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            result = self.hands.process(fit(rgb[y0:y1, x0:x1], self.roi_size))
+            if result.multi_hand_landmarks:
+                self.roi_hits += 1
+                for hand in result.multi_hand_landmarks:
+                    for p in hand.landmark:
+                        p.x = (x0 + p.x * (x1 - x0)) / width
+                        p.y = (y0 + p.y * (y1 - y0)) / height
+                self.box = self.box_around(result, width, height)
+                return result
+
+        self.searches += 1
+        result = self.hands.process(fit(rgb, self.search_size))
+        self.box = self.box_around(result, width, height) if result.multi_hand_landmarks else None
+        return result
+
+    def box_around(self, result, width, height):
+        points = hand_points(result).reshape(-1, 2) * (width, height)
+        (x0, y0), (x1, y1) = points.min(axis=0), points.max(axis=0)
+        pad = self.padding * max(x1 - x0, y1 - y0)
+        x0, y0 = max(0, int(x0 - pad)), max(0, int(y0 - pad))
+        x1, y1 = min(width, int(x1 + pad) + 1), min(height, int(y1 + pad) + 1)
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return x0, y0, x1, y1
+
+
+class CountSmoother:
+    """Most common count over the last few frames, so a single bad frame
+    does not make the label flicker.  Ties go to the newest count."""
+
+    def __init__(self, frames=SMOOTH_FRAMES):
+        self.recent = deque(maxlen=frames)
+        self.votes = Counter()
+
+    def update(self, finger_count):
+        if len(self.recent) == self.recent.maxlen:
+            self.votes[self.recent[0]] -= 1
+        self.recent.append(finger_count)
+        self.votes[finger_count] += 1
+        best = max(self.votes.values())
+        if self.votes[finger_count] == best:
+            return finger_count
+        return max(self.votes, key=self.votes.get)
+
+
+def draw_result(frame, result, finger_count):
+    for hand_landmarks in result.multi_hand_landmarks or []:
+        mp_draw.draw_landmarks(
+            frame,
+            hand_landmarks,
+            mp_hands.HAND_CONNECTIONS
+        )
 
     label = f"Fingers: {finger_count}"
 
@@ -74,10 +310,173 @@ while True:
         cv2.LINE_AA
     )
 
-    cv2.imshow("Hand Detection & Finger Count", frame)
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+class FingerCountPipeline:
+    """Capture and inference threads feeding the render stage on the main thread.
+
+    Stages are joined by LatestQueues, so a stall in the camera, in
+    MediaPipe or in the display drops stale frames rather than holding
+    the other stages up.  The detector only needs a process(rgb) method.
+    """
 
-cap.release()
-cv2.destroyAllWindows()
+    def __init__(self, source, hands, show=True, smooth_frames=SMOOTH_FRAMES, infer_every=1):
+        self.source = source
+        self.hands = hands
+        self.show = show
+        self.infer_every = max(1, infer_every)
+        self.smoother = CountSmoother(smooth_frames)
+        self.buffers = FrameBuffers()
+        self.frames = LatestQueue()
+        self.results = LatestQueue(on_drop=lambda item: self.buffers.release(item[1]))
+        self.times = StageTimes()
+        self.stopping = threading.Event()
+        self.captured = self.inferred = self.skipped = self.rendered = 0
+        self.elapsed = self.cpu = 0.0
+
+    def capture_loop(self):
+        try:
+            while not self.stopping.is_set():
+                start = time.perf_counter()
+                success, frame = self.source.read()
+                if not success:
+                    break
+                now = time.perf_counter()
+                self.times.add("capture", now - start)
+                self.captured += 1
+                self.frames.put((now, frame))
+        finally:
+            self.frames.close()
+
+    def inference_loop(self):
+        result, finger_count = None, 0
+        try:
+            while (item := self.frames.get()) is not None:
+                captured_at, frame = item
+                start = time.perf_counter()
+                frame, rgb = self.buffers.mirror(frame)
+                # Between inferences the last result is shown on the new frame
+                if result is None or (self.inferred + self.skipped) % self.infer_every == 0:
+                    result = self.hands.process(rgb)
+                    finger_count = self.smoother.update(count_fingers(result))
+                    self.inferred += 1
+                else:
+                    self.skipped += 1
+                self.times.add("inference", time.perf_counter() - start)
+                self.results.put((captured_at, frame, result, finger_count))
+        finally:
+            self.results.close()
+
+    def render_loop(self):
+        while not self.stopping.is_set():
+            item = self.results.get(timeout=0.05)
+            if item is None:
+                if self.results.closed:
+                    break
+                self.poll_quit()
+                continue
+
+            captured_at, frame, result, finger_count = item
+            start = time.perf_counter()
+            draw_result(frame, result, finger_count)
+            if self.show:
+                cv2.imshow(WINDOW, frame)
+                self.poll_quit()
+            self.buffers.release(frame)
+            done = time.perf_counter()
+            self.times.add("render", done - start)
+            self.times.add("latency", done - captured_at)
+            self.rendered += 1
+
+    def poll_quit(self):
+        if self.show and cv2.waitKey(1) & 0xFF == ord('q'):
+            self.stopping.set()
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self.capture_loop, daemon=True),
+            threading.Thread(target=self.inference_loop, daemon=True),
+        ]
+        begin = time.perf_counter()
+        cpu_begin = time.process_time()
+        for t in threads:
+            t.start()
+        try:
+            self.render_loop()
+        finally:
+            self.stopping.set()
+            for t in threads:
+                t.join()
+            self.elapsed = time.perf_counter() - begin
+            self.cpu = time.process_time() - cpu_begin
+            self.source.release()
+            if self.show:
+                cv2.destroyAllWindows()
+
+    def report(self):
+        elapsed = max(self.elapsed, 1e-9)
+        print(f"Frames     : {self.captured} captured, {self.inferred} inferred, {self.skipped} skipped, {self.rendered} rendered")
+        print(f"Dropped    : {self.frames.dropped} before inference, {self.results.dropped} before render")
+        print(f"Throughput : {self.rendered / elapsed:.1f} fps shown, {self.inferred / elapsed:.1f} fps inferred")
+        print(f"CPU        : {self.cpu / elapsed:.0%} of one core")
+        print(f"Buffers    : {self.buffers.allocated} frame buffers allocated")
+        if isinstance(self.hands, RoiTracker):
+            print(f"Tracking   : {self.hands.roi_hits} ROI hits, {self.hands.searches} full-frame searches")
+        for stage in STAGES:
+            print(f"{stage.capitalize():<11}: {self.times.summary(stage)}")
+
+
+def bench_postprocess(frames=20000, hands=MAX_HANDS):
+    """Per-frame cost of turning landmarks into a count and smoothing it."""
+    rng = np.random.default_rng(0)
+
+    def fake_result():
+        # Shaped like a MediaPipe result, so no model is needed
+        return SimpleNamespace(
+            multi_hand_landmarks=[
+                SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=0.0) for x, y in rng.random((21, 2))])
+                for _ in range(hands)
+            ],
+            multi_handedness=[
+                SimpleNamespace(classification=[SimpleNamespace(label=label)])
+                for label in rng.choice(["Left", "Right"], hands)
+            ],
+        )
+
+    results = [fake_result() for _ in range(frames)]
+    print(f"{hands} hand(s), {frames} frames")
+    start = time.perf_counter()
+    for r in results:
+        count_fingers(r)
+    print(f"{'counting':<22}: {(time.perf_counter() - start) / frames * 1e6:6.2f} us/frame")
+
+    smoother = CountSmoother()
+    counts = rng.integers(0, 11, frames).tolist()
+    start = time.perf_counter()
+    for c in counts:
+        smoother.update(c)
+    print(f"{'smoothing':<22}: {(time.perf_counter() - start) / frames * 1e6:6.2f} us/frame")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count raised fingers from a camera or video")
+    parser.add_argument("--source", default="0", help="camera index, video file, or synthetic[:FRAMES] (default 0)")
+    parser.add_argument("--headless", action="store_true", help="run every stage but do not open a window")
+    parser.add_argument("--max-hands", type=int, default=MAX_HANDS)
+    parser.add_argument("--smooth", type=int, default=SMOOTH_FRAMES, metavar="FRAMES", help="majority vote over this many frames (1 = off)")
+    parser.add_argument("--roi", action="store_true", help="track a cropped region around the hands between frames")
+    parser.add_argument("--roi-size", type=int, default=ROI_SIZE, help="longest side of the crop given to MediaPipe")
+    parser.add_argument("--search-size", type=int, default=0, help="downscale full-frame searches to this longest side (0 = off)")
+    parser.add_argument("--infer-every", type=int, default=1, metavar="N", help="run MediaPipe on every Nth frame only")
+    parser.add_argument("--bench-post", action="store_true", help="time landmark post-processing per frame and exit")
+    args = parser.parse_args()
+
+    if args.bench_post:
+        bench_postprocess(hands=args.max_hands)
+    else:
+        with make_hands(max_num_hands=args.max_hands) as hands:
+            detector = RoiTracker(hands, args.roi_size, args.search_size) if args.roi else hands
+            pipeline = FingerCountPipeline(
+                open_source(args.source), detector, not args.headless, args.smooth, args.infer_every
+            )
+            pipeline.run()
+        pipeline.report()
@@ -0,0 +1,239 @@
+import argparse
+import time
+
+from colorama import Fore, init
+
+init(autoreset=True)
+
+PLAYERS = ("X", "O")
+EMPTY = "."
+WIN = 10 ** 9
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class Board:
+    """N x N board where K in a row wins.
+
+    Every run of K cells (a window) keeps a count of each player's stones
+    in it.  Playing or undoing a move only touches the windows through
+    that cell, which gives both the win check and a running evaluation
+    without rescanning the board.  Free cells are tracked by a counter.
+    """
+
+    def __init__(self, size=3, k=3):
+        if not 1 <= k <= size:
+            raise ValueError("Need 1 <= k <= size")
+        self.size = size
+        self.k = k
+        self.cells = [EMPTY] * (size * size)
+        self.empty = size * size
+        self.history = []
+        self.winner = None
+        self.weights = [0] + [10 ** n for n in range(k - 1)] + [WIN]
+
+        windows = []
+        for row in range(size):
+            for col in range(size):
+                for dr, dc in DIRECTIONS:
+                    end_row, end_col = row + dr * (k - 1), col + dc * (k - 1)
+                    if 0 <= end_row < size and 0 <= end_col < size:
+                        windows.append([(row + dr * i) * size + col + dc * i for i in range(k)])
+        self.cell_windows = [[] for _ in self.cells]
+        for w, cells in enumerate(windows):
+            for cell in cells:
+                self.cell_windows[cell].append(w)
+        self.counts = ([0] * len(windows), [0] * len(windows))
+        self.score = 0  # evaluation for X, minus the same for O
+
+    def window_value(self, w):
+        x, o = self.counts[0][w], self.counts[1][w]
+        if x and o:
+            return 0
+        return self.weights[x] - self.weights[o]
+
+    def play(self, cell, player):
+        """Place player's stone (0 or 1); returns True if it completed K in a row."""
+        if self.cells[cell] != EMPTY:
+            raise ValueError(f"Cell {cell} is taken")
+        self.cells[cell] = PLAYERS[player]
+        self.empty -= 1
+        self.history.append((cell, player))
+        counts = self.counts[player]
+        won = False
+        for w in self.cell_windows[cell]:
+            old = self.window_value(w)
+            counts[w] += 1
+            self.score += self.window_value(w) - old
+            won |= counts[w] == self.k
+        if won:
+            self.winner = player
+        return won
+
+    def undo(self):
+        cell, player = self.history.pop()
+        self.cells[cell] = EMPTY
+        self.empty += 1
+        self.winner = None
+        counts = self.counts[player]
+        for w in self.cell_windows[cell]:
+            old = self.window_value(w)
+            counts[w] -= 1
+            self.score += self.window_value(w) - old
+
+    def is_full(self):
+        return self.empty == 0
+
+    def candidates(self):
+        """Empty cells next to a stone (all cells on an empty board's centre)."""
+        if not self.history:
+            return [(self.size // 2) * self.size + self.size // 2]
+        if self.size <= 4:
+            return [i for i, c in enumerate(self.cells) if c == EMPTY]
+        near = set()
+        for cell, _ in self.history:
+            row, col = divmod(cell, self.size)
+            for r in range(max(0, row - 1), min(self.size, row + 2)):
+                for c in range(max(0, col - 1), min(self.size, col + 2)):
+                    if self.cells[r * self.size + c] == EMPTY:
+                        near.add(r * self.size + c)
+        return list(near)
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class Searcher:
+    """Iterative-deepening negamax with alpha-beta under a time budget.
+
+    Each deeper search starts with the previous best move, and when time
+    runs out the best move of the last completed depth is played.
+    """
+
+    def __init__(self, budget=1.0):
+        self.budget = budget
+        self.nodes = 0
+        self.depth = 0
+
+    def best_move(self, board, player):
+        self.deadline = time.perf_counter() + self.budget
+        self.nodes = 0
+        moves = self.ordered(board, player, board.candidates())
+        best = moves[0]
+        for depth in range(1, board.empty + 1):
+            try:
+                score, move = self.root(board, player, depth, [best] + [m for m in moves if m != best])
+            except OutOfTime:
+                break
+            best, self.depth = move, depth
+            if abs(score) >= WIN // 2:
+                break
+        return best
+
+    def ordered(self, board, player, moves):
+        """Moves sorted by how much they improve player's evaluation straight away."""
+        sign = 1 if player == 0 else -1
+
+        def gain(cell):
+            board.play(cell, player)
+            value = board.score * sign
+            board.undo()
+            return value
+
+        return sorted(moves, key=gain, reverse=True)
+
+    def root(self, board, player, depth, moves):
+        alpha, best = -WIN * 2, moves[0]
+        for cell in moves:
+            score = self.child(board, player, cell, depth, alpha, WIN * 2, 0)
+            if score > alpha:
+                alpha, best = score, cell
+        return alpha, best
+
+    def child(self, board, player, cell, depth, alpha, beta, ply):
+        try:
+            if board.play(cell, player):
+                return WIN - ply
+            if board.is_full():
+                return 0
+            if depth <= 1:
+                return board.score if player == 0 else -board.score
+            return -self.negamax(board, 1 - player, depth - 1, -beta, -alpha, ply + 1)
+        finally:
+            # Also runs when OutOfTime unwinds the search
+            board.undo()
+
+    def negamax(self, board, player, depth, alpha, beta, ply):
+        self.nodes += 1
+        if time.perf_counter() > self.deadline:
+            raise OutOfTime
+        best = -WIN * 2
+        for cell in self.ordered(board, player, board.candidates()):
+            best = max(best, self.child(board, player, cell, depth, alpha, beta, ply))
+            alpha = max(alpha, best)
+            if alpha >= beta:
+                break
+        return best
+
+
+def display_board(board):
+    width = len(str(board.size))
+    print()
+    print(" " * (width + 1) + " ".join(f"{c + 1:>{width}}" for c in range(board.size)))
+    for row in range(board.size):
+        cells = board.cells[row * board.size:(row + 1) * board.size]
+        colored = [
+            (Fore.RED if c == "X" else Fore.BLUE if c == "O" else Fore.YELLOW) + f"{c:>{width}}" + Fore.RESET
+            for c in cells
+        ]
+        print(f"{row + 1:>{width}} " + " ".join(colored))
+    print()
+
+
+def player_move(board):
+    while True:
+        try:
+            row, col = (int(v) - 1 for v in input(Fore.GREEN + "Enter move (row col): ").split())
+            if not (0 <= row < board.size and 0 <= col < board.size):
+                print(Fore.RED + f"Rows and columns go from 1 to {board.size}.")
+            elif board.cells[row * board.size + col] != EMPTY:
+                print(Fore.RED + "This position is already taken. Please choose another.")
+            else:
+                return row * board.size + col
+        except ValueError:
+            print(Fore.RED + "Enter a row and a column, e.g. 2 3.")
+
+
+def main(size, k, budget, watch=False):
+    board = Board(size, k)
+    searcher = Searcher(budget)
+    player = 0
+    display_board(board)
+
+    while True:
+        if player == 0 and not watch:
+            cell = player_move(board)
+        else:
+            start = time.perf_counter()
+            cell = searcher.best_move(board, player)
+            print(Fore.CYAN + f"{PLAYERS[player]} plays {cell // size + 1} {cell % size + 1} "
+                  f"(depth {searcher.depth}, {searcher.nodes} nodes, {time.perf_counter() - start:.2f} s)")
+        won = board.play(cell, player)
+        display_board(board)
+        if won:
+            print(Fore.GREEN + f"{PLAYERS[player]} wins!")
+            break
+        if board.is_full():
+            print(Fore.YELLOW + "It's a draw.")
+            break
+        player = 1 - player
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="K-in-a-row on an N x N board against the computer")
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("-k", type=int, default=3, help="stones in a row needed to win")
+    parser.add_argument("--time", type=float, default=1.0, help="seconds the AI may think per move")
+    parser.add_argument("--watch", action="store_true", help="let the AI play both sides")
+    args = parser.parse_args()
+    main(args.size, args.k, args.time, args.watch)
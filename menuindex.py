@@ -0,0 +1,105 @@
+import bisect
+import random
+import string
+import time
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class MenuIndex:
+    """Type-ahead index over menu item names.
+
+    Word prefixes are kept in a sorted list for bisect lookups, and every
+    name's trigrams point back to it so substring queries only have to
+    check names that share all of the query's trigrams.  Both are updated
+    one name at a time as items are added or removed.
+    """
+
+    def __init__(self, names=()):
+        self.prefixes = []
+        self.grams = {}
+        self.names = set()
+        for name in names:
+            self._add(name, self.prefixes.append)
+        self.prefixes.sort()
+
+    @staticmethod
+    def words(key):
+        # The whole name plus the tail starting at each later word
+        starts = [0] + [i + 1 for i, ch in enumerate(key) if ch == " "]
+        return {key[i:] for i in starts if i < len(key)}
+
+    def add(self, name):
+        self._add(name, lambda entry: bisect.insort(self.prefixes, entry))
+
+    def _add(self, name, add_prefix):
+        if name in self.names:
+            return
+        self.names.add(name)
+        key = name.lower()
+        for word in self.words(key):
+            add_prefix((word, name))
+        for gram in trigrams(key):
+            self.grams.setdefault(gram, set()).add(name)
+
+    def remove(self, name):
+        if name not in self.names:
+            return
+        self.names.discard(name)
+        key = name.lower()
+        for word in self.words(key):
+            i = bisect.bisect_left(self.prefixes, (word, name))
+            del self.prefixes[i]
+        for gram in trigrams(key):
+            self.grams[gram].discard(name)
+
+    def search(self, query, limit=None):
+        """Names matching query: word-prefix matches first, then substring matches."""
+        query = query.strip().lower()
+        if not query:
+            return None
+
+        found = {}
+        i = bisect.bisect_left(self.prefixes, (query,))
+        while i < len(self.prefixes) and self.prefixes[i][0].startswith(query):
+            found.setdefault(self.prefixes[i][1])
+            if limit and len(found) >= limit:
+                return list(found)
+            i += 1
+
+        if len(query) >= 3:
+            postings = sorted((self.grams.get(g, set()) for g in trigrams(query)), key=len)
+            candidates = set.intersection(*postings) if postings[0] else set()
+            for name in sorted(candidates):
+                if query in name.lower():
+                    found.setdefault(name)
+                    if limit and len(found) >= limit:
+                        break
+        return list(found)
+
+
+def bench(sizes=(1000, 10000, 100000), queries=200):
+    """Print build time and mean/worst search latency for synthetic menus."""
+    words = ["".join(random.choices(string.ascii_lowercase, k=random.randint(3, 8))) for _ in range(2000)]
+    print(f"{'Items':>8} {'Build':>10} {'Mean search':>13} {'Worst search':>14}")
+    for n in sizes:
+        names = {" ".join(random.sample(words, random.randint(1, 3))) for _ in range(n)}
+        start = time.perf_counter()
+        index = MenuIndex(names)
+        build = time.perf_counter() - start
+
+        samples = random.sample(sorted(names), min(queries, len(names)))
+        timings = []
+        for name in samples:
+            for q in (name[:1], name[:3], name[1:5]):
+                start = time.perf_counter()
+                index.search(q)
+                timings.append(time.perf_counter() - start)
+        mean = sum(timings) / len(timings)
+        print(f"{len(names):>8} {build * 1000:>7.1f} ms {mean * 1000:>10.3f} ms {max(timings) * 1000:>11.3f} ms")
+
+
+if __name__ == "__main__":
+    bench()
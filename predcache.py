@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+
+_spaces = re.compile(r"\s+")
+
+
+def collapse_spaces(text):
+    """Cache key for text: runs of whitespace collapsed, case kept."""
+    return _spaces.sub(" ", text).strip()
+
+
+def normalize(text):
+    """Cache key for text: case-folded with runs of whitespace collapsed.
+
+    Only for models that ignore case themselves, like the TF-IDF intent
+    classifier; sentiment scores change with case (":D" vs ":d").
+    """
+    return collapse_spaces(text).lower()
+
+
+def file_version(*paths):
+    """A version string that changes whenever any of the given files is rewritten."""
+    h = hashlib.sha1()
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"{path}:{st.st_mtime_ns}:{st.st_size}".encode())
+    return h.hexdigest()[:16]
+
+
+class PredictionCache:
+    """Size-bounded LRU cache of predictions keyed by normalized text.
+
+    normalize turns a text into its key and must only merge texts the model
+    scores the same; it defaults to collapse_spaces.  Its name is part of the
+    stored version, so switching it discards keys made the old way.
+
+    Entries belong to a namespace (which model they come from) and a model
+    version; opening the cache with a different version discards what the
+    same namespace cached for the old one, leaving other namespaces in a
+    shared file alone.  With a path the cache is written through to SQLite
+    and survives restarts; each namespace keeps at most disk_maxsize rows
+    there, dropping the oldest first.  Values must be JSON-serializable.
+    """
+
+    def __init__(self, maxsize=10000, version="", path=None, namespace="", disk_maxsize=100000,
+                 normalize=collapse_spaces):
+        self.maxsize = maxsize
+        self.version = f"{version}/{normalize.__name__}"
+        self.normalize = normalize
+        self.namespace = namespace
+        self.disk_maxsize = disk_maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.compute_time = 0.0
+        self.conn = None
+        if path:
+            self.conn = sqlite3.connect(path)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            with self.conn:
+                columns = [row[1] for row in self.conn.execute("PRAGMA table_info(predictions)")]
+                if columns and "namespace" not in columns:
+                    # Cache files from before namespaces; the contents are disposable
+                    self.conn.execute("DROP TABLE predictions")
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS predictions "
+                    "(namespace TEXT, version TEXT, key TEXT, value TEXT, PRIMARY KEY (namespace, version, key))"
+                )
+                self.conn.execute(
+                    "DELETE FROM predictions WHERE namespace = ? AND version != ?", (namespace, self.version)
+                )
+            self.disk_rows = self._count_rows()
+
+    def get_or_compute(self, text, compute):
+        key = self.normalize(text)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        if self.conn:
+            row = self.conn.execute(
+                "SELECT value FROM predictions WHERE namespace = ? AND version = ? AND key = ?",
+                (self.namespace, self.version, key)
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return self._remember(key, json.loads(row[0]))
+
+        start = time.perf_counter()
+        value = compute(text)
+        self.compute_time += time.perf_counter() - start
+        self.misses += 1
+        if self.conn:
+            self._store(key, value)
+        return self._remember(key, value)
+
+    def _count_rows(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM predictions WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+
+    def _store(self, key, value):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                (self.namespace, self.version, key, json.dumps(value))
+            )
+            self.disk_rows += 1
+            if self.disk_rows > self.disk_maxsize:
+                # Trim to 90% of the cap so this runs once per many writes;
+                # rowids grow with every insert, so the lowest are the oldest
+                self.conn.execute(
+                    "DELETE FROM predictions WHERE rowid IN "
+                    "(SELECT rowid FROM predictions WHERE namespace = ? ORDER BY rowid LIMIT ?)",
+                    (self.namespace, self._count_rows() - self.disk_maxsize * 9 // 10)
+                )
+                self.disk_rows = self._count_rows()
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        mean_compute = self.compute_time / self.misses if self.misses else 0.0
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_ms": round(self.hits * mean_compute * 1000, 2),
+        }
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
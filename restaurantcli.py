@@ -0,0 +1,156 @@
+import argparse
+import csv
+import json
+import sys
+from contextlib import nullcontext
+
+from store import DB_FILE, TAX_RATE, RestaurantStore
+
+SALES_FIELDS = ("date", "customer", "phone", "item", "qty", "price", "total")
+MENU_FIELDS = ("name", "price", "stock")
+
+
+def open_input(path):
+    return nullcontext(sys.stdin) if path == "-" else open(path, newline="")
+
+
+def open_output(path):
+    return nullcontext(sys.stdout) if path == "-" else open(path, "w", newline="")
+
+
+def read_rows(f, fmt):
+    """Yield one dict per CSV/JSONL record without reading the whole file."""
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+    else:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {n}: {e}") from None
+            if not isinstance(record, dict):
+                raise ValueError(f"line {n}: expected a JSON object, got {type(record).__name__}")
+            yield record
+
+
+def guess_format(path, fmt):
+    if fmt:
+        return fmt
+    return "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+
+
+def optional(value, kind):
+    if value is None or value == "":
+        return None
+    return kind(value)
+
+
+def whole_number(value):
+    """int(value), refusing values like 2.5 that int() would silently cut."""
+    if isinstance(value, int):
+        return value
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(f"stock must be a whole number, got {value!r}")
+    return int(number)
+
+
+def menu_rows(rows, apply_tax=False, partial=False):
+    for n, row in enumerate(rows, 1):
+        try:
+            name = str(row["name"]).strip()
+            if not name:
+                raise ValueError("empty name")
+            price = optional(row.get("price"), float)
+            stock = optional(row.get("stock"), whole_number)
+            if not partial and (price is None or stock is None):
+                raise ValueError("price and stock are required")
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"record {n}: {e}") from None
+        if price is not None:
+            price = round(price * TAX_RATE, 2) if apply_tax else round(price, 2)
+        yield name, price, stock
+
+
+def write_rows(f, fmt, fields, rows):
+    if fmt == "csv":
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            f.write(json.dumps(dict(zip(fields, row))) + "\n")
+
+
+def import_menu(store, args):
+    with open_input(args.file) as f:
+        rows = menu_rows(read_rows(f, guess_format(args.file, args.format)), apply_tax=args.apply_tax)
+        store.save_items(rows)
+    print(f"Imported menu from {args.file}", file=sys.stderr)
+
+
+def update_menu(store, args):
+    with open_input(args.file) as f:
+        rows = menu_rows(read_rows(f, guess_format(args.file, args.format)), apply_tax=args.apply_tax, partial=True)
+        matched = store.update_items(rows, stock_delta=args.stock_delta)
+    print(f"Updated {matched} items", file=sys.stderr)
+
+
+def export_menu(store, args):
+    rows = store.conn.execute("SELECT name, price, stock FROM menu ORDER BY id")
+    with open_output(args.output) as f:
+        write_rows(f, guess_format(args.output, args.format), MENU_FIELDS, rows)
+
+
+def export_sales(store, args):
+    rows = (r[1:] for r in store.query(args.start, args.end, args.item))
+    with open_output(args.output) as f:
+        write_rows(f, guess_format(args.output, args.format), SALES_FIELDS, rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless menu and sales tools for the restaurant database")
+    parser.add_argument("--db", default=DB_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("import-menu", help="add or replace items from CSV/JSONL (name, price, stock)")
+    p.add_argument("file", help="input file, or - for stdin")
+    p.add_argument("--format", choices=("csv", "jsonl"))
+    p.add_argument("--apply-tax", action="store_true", help="prices are base prices; add tax like the Add Item form")
+    p.set_defaults(run=import_menu)
+
+    p = commands.add_parser("update-menu", help="bulk update price and/or stock of existing items")
+    p.add_argument("file", help="input file, or - for stdin; blank price/stock are left unchanged")
+    p.add_argument("--format", choices=("csv", "jsonl"))
+    p.add_argument("--apply-tax", action="store_true")
+    p.add_argument("--stock-delta", action="store_true", help="add stock values to the current stock")
+    p.set_defaults(run=update_menu)
+
+    p = commands.add_parser("export-menu", help="write the menu as CSV/JSONL")
+    p.add_argument("-o", "--output", default="-")
+    p.add_argument("--format", choices=("csv", "jsonl"))
+    p.set_defaults(run=export_menu)
+
+    p = commands.add_parser("export-sales", help="write sales as CSV/JSONL")
+    p.add_argument("--from", dest="start", help="first date, YYYY-MM-DD")
+    p.add_argument("--to", dest="end", help="last date, YYYY-MM-DD")
+    p.add_argument("--item")
+    p.add_argument("-o", "--output", default="-")
+    p.add_argument("--format", choices=("csv", "jsonl"))
+    p.set_defaults(run=export_sales)
+
+    args = parser.parse_args(argv)
+    store = RestaurantStore(args.db)
+    try:
+        args.run(store, args)
+    except ValueError as e:
+        # The whole import ran in one transaction, so nothing was written
+        parser.exit(1, f"Error: {e}\n")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+
+import numpy as np
+
+from store import DB_FILE, RestaurantStore
+
+
+class Codes:
+    """Maps repeated strings (dates, items, customers) to dense integer codes."""
+
+    def __init__(self):
+        self.index = {}
+        self.names = []
+
+    def code(self, name):
+        c = self.index.get(name)
+        if c is None:
+            c = self.index[name] = len(self.names)
+            self.names.append(name)
+        return c
+
+    def __len__(self):
+        return len(self.names)
+
+
+class Column:
+    """A growable NumPy column; appends are amortized O(1)."""
+
+    def __init__(self, dtype):
+        self.data = np.zeros(1024, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        end = self.size + len(values)
+        if end > len(self.data):
+            grown = np.zeros(max(end, len(self.data) * 2), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+    @property
+    def values(self):
+        return self.data[:self.size]
+
+
+class SalesReport:
+    """Per-day, per-item and per-customer sales rollups, kept current incrementally.
+
+    The existing history is summed by SQLite (per day and item, and per
+    customer), so memory follows the number of distinct (day, item) pairs
+    and customers rather than the number of sales rows.  refresh() folds
+    in only rows added since, the day/item ones as extra cells.  Reports
+    over the whole history are a lookup; item reports over a date range
+    are a single masked bincount over the cells, and customer reports over
+    a date range are left to an indexed query on the store.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.days = Codes()
+        self.items = Codes()
+        self.customers = Codes()
+        # (day, item) cells carrying qty and revenue
+        self.day_col = Column(np.int32)
+        self.item_col = Column(np.int32)
+        self.qty_col = Column(np.int64)
+        self.total_col = Column(np.float64)
+        self.day_revenue = np.zeros(0)
+        self.item_revenue = np.zeros(0)
+        self.item_qty = np.zeros(0, dtype=np.int64)
+        self.customer_revenue = np.zeros(0)
+
+        self.last_id = store.last_id()
+        self._add_item_cells(store.item_totals_by_day(self.last_id))
+        self._add_customers(store.customer_totals(up_to_id=self.last_id))
+
+    def refresh(self):
+        rows = self.store.since(self.last_id).fetchall()
+        if not rows:
+            return 0
+        ids, dates, names, phones, items, qtys, prices, totals = zip(*rows)
+        self._add_item_cells(zip(dates, items, qtys, totals))
+        self._add_customers(zip(names, phones, totals))
+        self.last_id = ids[-1]
+        return len(rows)
+
+    def _add_item_cells(self, cells):
+        cells = list(cells)
+        if not cells:
+            return
+        dates, items, qtys, totals = zip(*cells)
+        day = np.array([self.days.code(d) for d in dates], dtype=np.int32)
+        item = np.array([self.items.code(i) for i in items], dtype=np.int32)
+        qty = np.array(qtys, dtype=np.int64)
+        total = np.array(totals, dtype=np.float64)
+
+        self.day_col.extend(day)
+        self.item_col.extend(item)
+        self.qty_col.extend(qty)
+        self.total_col.extend(total)
+
+        self.day_revenue = self._accumulate(self.day_revenue, day, total, len(self.days))
+        self.item_revenue = self._accumulate(self.item_revenue, item, total, len(self.items))
+        self.item_qty = self._accumulate(self.item_qty, item, qty, len(self.items))
+
+    def _add_customers(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        names, phones, totals = zip(*rows)
+        customer = np.array([self.customers.code(c) for c in zip(names, phones)], dtype=np.int32)
+        total = np.array(totals, dtype=np.float64)
+        self.customer_revenue = self._accumulate(self.customer_revenue, customer, total, len(self.customers))
+
+    @staticmethod
+    def _accumulate(rollup, codes, weights, size):
+        grown = np.zeros(size, dtype=rollup.dtype)
+        grown[:len(rollup)] = rollup
+        grown += np.bincount(codes, weights=weights, minlength=size).astype(rollup.dtype)
+        return grown
+
+    def _range_mask(self, start, end):
+        in_range = np.array([(not start or d >= start) and (not end or d <= end) for d in self.days.names], dtype=bool)
+        return in_range[self.day_col.values]
+
+    # ================= REPORTS =================
+
+    def revenue_by_day(self, start=None, end=None):
+        """[(date, revenue)] in date order."""
+        return sorted(
+            (d, float(r)) for d, r in zip(self.days.names, self.day_revenue)
+            if (not start or d >= start) and (not end or d <= end)
+        )
+
+    def revenue_by_item(self, start=None, end=None):
+        """{item: (qty, revenue)}."""
+        qty, revenue = self._item_totals(start, end)
+        return {name: (int(q), float(r)) for name, q, r in zip(self.items.names, qty, revenue)}
+
+    def _item_totals(self, start, end):
+        if not start and not end:
+            return self.item_qty, self.item_revenue
+        mask = self._range_mask(start, end)
+        item = self.item_col.values[mask]
+        size = len(self.items)
+        qty = np.bincount(item, weights=self.qty_col.values[mask], minlength=size)
+        revenue = np.bincount(item, weights=self.total_col.values[mask], minlength=size)
+        return qty, revenue
+
+    def top_items(self, n=10, by="revenue", start=None, end=None):
+        """The n best sellers as [(item, qty, revenue)], by "revenue" or "qty"."""
+        qty, revenue = self._item_totals(start, end)
+        key = qty if by == "qty" else revenue
+        order = np.argsort(-key, kind="stable")[:n]
+        return [(self.items.names[i], int(qty[i]), float(revenue[i])) for i in order if key[i] > 0]
+
+    def customer_totals(self, n=None, start=None, end=None):
+        """[(name, phone, revenue)], biggest spenders first."""
+        if start or end:
+            rows = sorted(self.store.customer_totals(start, end), key=lambda r: -r[2])
+            return [(name, phone, float(revenue)) for name, phone, revenue in rows[:n] if revenue > 0]
+        order = np.argsort(-self.customer_revenue, kind="stable")[:n]
+        return [(*self.customers.names[i], float(self.customer_revenue[i])) for i in order if self.customer_revenue[i] > 0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sales reports")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--from", dest="start", help="first date, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="last date, YYYY-MM-DD")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    report = SalesReport(RestaurantStore(args.db))
+
+    print("Revenue by day")
+    for d, revenue in report.revenue_by_day(args.start, args.end):
+        print(f"  {d}  BDT {revenue:12.2f}")
+
+    print(f"\nTop {args.top} items")
+    for item, qty, revenue in report.top_items(args.top, start=args.start, end=args.end):
+        print(f"  {item:<25} {qty:>8}  BDT {revenue:12.2f}")
+
+    print(f"\nTop {args.top} customers")
+    for name, phone, revenue in report.customer_totals(args.top, args.start, args.end):
+        print(f"  {name:<20} {phone:<15} BDT {revenue:12.2f}")
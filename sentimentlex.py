@@ -0,0 +1,120 @@
+import os
+import re
+from importlib.util import find_spec
+from xml.etree import ElementTree
+
+import numpy as np
+
+from predcache import file_version
+
+NEGATIONS = ("no", "not", "n't", "never")
+MODIFIER_POS = "RB"
+_token = re.compile(r"[a-z]+(?=n't)|n't|[a-z]+(?:-[a-z]+)*|!")
+
+
+def lexicon_path():
+    """The sentiment lexicon shipped with TextBlob, found without importing it."""
+    spec = find_spec("textblob")
+    return os.path.join(spec.submodule_search_locations[0], "en", "en-sentiment.xml")
+
+
+class LexiconScorer:
+    """Batch polarity scorer over TextBlob's word lexicon.
+
+    The XML lexicon is compiled once into a word -> row map plus arrays of
+    polarity, intensity and modifier/negation flags.  A batch is tokenized
+    into one flat array of rows, and the pattern analyzer's rules ("very
+    good", "not good", "good!") are applied to the whole batch with array
+    operations before averaging per text.
+    """
+
+    name = "lexicon"
+
+    def __init__(self, path=None):
+        path = path or lexicon_path()
+        senses = {}
+        for w in ElementTree.parse(path).getroot().iter("word"):
+            form = w.get("form")
+            if form:
+                polarity, intensity = float(w.get("polarity", 0.0)), float(w.get("intensity", 1.0))
+                senses.setdefault(form, {}).setdefault(w.get("pos"), []).append((polarity, intensity))
+
+        self.rows = {"": 0}  # row 0 is "not in the lexicon"
+        polarity, intensity, known, modifier = [0.0], [1.0], [False], [False]
+        for form, by_pos in senses.items():
+            # Average the senses of each part of speech, then the parts of speech
+            per_pos = [np.mean(v, axis=0) for v in by_pos.values()]
+            p, i = np.mean(per_pos, axis=0)
+            self.rows[form] = len(polarity)
+            polarity.append(p)
+            intensity.append(i)
+            known.append(True)
+            modifier.append(MODIFIER_POS in by_pos)
+        for word in NEGATIONS:
+            if word not in self.rows:
+                self.rows[word] = len(polarity)
+                polarity.append(0.0)
+                intensity.append(1.0)
+                known.append(False)
+                modifier.append(False)
+        self.exclaim = self.rows["!"] = len(polarity)
+        polarity.append(0.0)
+        intensity.append(1.0)
+        known.append(False)
+        modifier.append(False)
+
+        self.polarity = np.array(polarity)
+        self.intensity = np.array(intensity)
+        self.known = np.array(known)
+        self.modifier = np.array(modifier)
+        self.negation = np.zeros(len(polarity), dtype=bool)
+        self.negation[[self.rows[w] for w in NEGATIONS]] = True
+        self.version = "lexicon-" + file_version(path)
+
+    def polarity_of(self, text):
+        return self.polarities([text])[0]
+
+    def polarities(self, texts):
+        rows, owner = [], []
+        get = self.rows.get
+        for n, text in enumerate(texts):
+            # Unknown one-letter words are skipped so "not a good" reads as "not good"
+            tokens = [r for t in _token.findall(text.lower()) if (r := get(t, 0)) or len(t) > 1]
+            rows.extend(tokens)
+            owner.extend([n] * len(tokens))
+        if not rows:
+            return [0.0] * len(texts)
+
+        rows = np.array(rows)
+        owner = np.array(owner)
+        same_prev = np.zeros(len(rows), dtype=bool)
+        same_prev[1:] = owner[1:] == owner[:-1]
+        prev = np.roll(rows, 1)
+
+        known = self.known[rows]
+        # A known modifier right before a known word scales it instead of
+        # counting on its own: "very good" is one assessment
+        modified = known & same_prev & self.modifier[prev] & self.known[prev]
+        counted = known.copy()
+        counted[:-1] &= ~modified[1:]
+
+        # "not good" is slightly bad; across a modifier the negation also
+        # inverts its intensity, so "not very good" is only mildly bad
+        negated = same_prev & self.negation[prev]
+        negated_modifier = np.zeros(len(rows), dtype=bool)
+        negated_modifier[2:] = modified[2:] & same_prev[1:-1] & self.negation[rows[:-2]]
+
+        value = self.polarity[rows]
+        scale = np.where(negated_modifier, 1.0 / self.intensity[prev], self.intensity[prev])
+        value = np.where(modified, np.clip(value * scale, -1.0, 1.0), value)
+        value = np.where(known & (negated | negated_modifier), value * -0.5, value)
+
+        # "good!" is a bit more so
+        exclaimed = np.zeros(len(rows), dtype=bool)
+        exclaimed[:-1] = (rows[1:] == self.exclaim) & same_prev[1:]
+        value = np.where(exclaimed, np.clip(value * 1.25, -1.0, 1.0), value)
+
+        total = np.bincount(owner[counted], value[counted], minlength=len(texts))
+        count = np.bincount(owner[counted], minlength=len(texts))
+        scores = np.divide(total, count, out=np.zeros(len(texts)), where=count > 0)
+        return np.round(scores, 3).tolist()
@@ -1,20 +1,59 @@
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from colorama import Fore, Style, init
-from textblob import TextBlob
-from datetime import datetime
+from importlib.metadata import version
 
-init(autoreset=True)
+from predcache import PredictionCache
+from sentimentlex import LexiconScorer
+from sentimentstats import HISTORY_FILE, HistoryLog, RunningStats, load_stats
+from textbatch import chunked, read_texts
 
-print(f"{Fore.BLUE} {Style.BRIGHT} SENTIMENT SPY")
-name = input(f"{Fore.MAGENTA}Enter your name: ").strip() or "Agent"
-print(f"{Fore.CYAN}Welcome, {name}")
-print(f"{Fore.CYAN}Commands: :help :stats :reset :exit\n")
 
-history = []
+class TextBlobBackend:
+    """Polarity from TextBlob's pattern analyzer, one text at a time.
 
-def analyze(text):
-    polarity = round(TextBlob(text).sentiment.polarity, 3)
-    confidence = round(abs(polarity) * 100, 2)
+    A backend has a name, a version for cache keys, and polarity_of(text)
+    and polarities(texts) returning scores rounded to 3 places.
+    """
+
+    name = "textblob"
+
+    def __init__(self):
+        # Importing TextBlob is slow, so only pay for it when it is used
+        from textblob import TextBlob
+        self.blob = TextBlob
+        self.version = f"textblob-{version('textblob')}"
+
+    def polarity_of(self, text):
+        return round(self.blob(text).sentiment.polarity, 3)
+
+    def polarities(self, texts):
+        return [self.polarity_of(t) for t in texts]
+
+BACKENDS = {"textblob": TextBlobBackend, "lexicon": LexiconScorer}
+_loaded = {}
+
+def get_backend(name="textblob"):
+    if name not in _loaded:
+        _loaded[name] = BACKENDS[name]()
+    return _loaded[name]
+
+def analyze(text, cache=None, backend=None):
+    backend = backend or get_backend()
+    if cache is not None:
+        polarity = cache.get_or_compute(text, backend.polarity_of)
+    else:
+        polarity = backend.polarity_of(text)
+    return classify(polarity)
 
+def classify(polarity):
+    confidence = round(abs(polarity) * 100, 2)
     if polarity >= 0.3:
         return "Positive", polarity, confidence, Fore.GREEN
     if polarity <= -0.3:
@@ -25,60 +64,207 @@ def show_help():
     print(f"""{Fore.CYAN}
     :help     Show commands
     :stats    Session summary
+    :history  Summary of all saved sessions
+    :cache    Prediction cache summary
     :reset    Clear data
     :exit     Exit
     """)
 
 
-def show_stats():
-    if not history:
-        print(f"{Fore.RED}No data available")
+def show_stats(stats, file=sys.stdout):
+    if not stats.count:
+        print(f"{Fore.RED}No data available", file=file)
         return
-    avg = round(sum(h["polarity"] for h in history) / len(history), 3)
-    pos = sum(1 for h in history if h["polarity"] > 0)
-    neg = sum(1 for h in history if h["polarity"] < 0)
-    neu = len(history) - pos - neg
+    windows = "".join(
+        f"\n    Last {w.size:<7}: {round(w.mean, 3)}" for w in stats.windows if stats.count > w.size
+    )
+    print(f"""{Fore.CYAN}
+    Total Inputs : {stats.count}
+    Positive     : {stats.positive}
+    Negative     : {stats.negative}
+    Neutral      : {stats.neutral}
+    Avg Polarity : {round(stats.mean, 3)}
+    Std Dev      : {round(stats.stdev, 3)}{windows}
+    """, file=file)
 
+def show_cache(cache):
+    stats = cache.stats()
     print(f"""{Fore.CYAN}
-    Total Inputs : {len(history)}
-    Positive     : {pos}
-    Negative     : {neg}
-    Neutral      : {neu}
-    Avg Polarity : {avg}
+    Cached Texts : {stats['size']}
+    Hits         : {stats['hits']}
+    Misses       : {stats['misses']}
+    Hit Rate     : {stats['hit_rate']:.0%}
+    Time Saved   : {stats['saved_ms']} ms
     """)
 
-while True:
-    user_input = input(f"{Fore.GREEN}>> ").strip()
-
-    if not user_input:
-        print(f"{Fore.RED}Input required")
-        continue
-
-    if user_input.startswith(":"):
-        if user_input == ":exit":
-            print(f"{Fore.BLUE}Session closed")
-            break
-        if user_input == ":help":
-            show_help()
-        elif user_input == ":stats":
-            show_stats()
-        elif user_input == ":reset":
-            history.clear()
-            print(f"{Fore.YELLOW}Session reset")
-        else:
-            print(f"{Fore.RED}Invalid command")
-        continue
-
-    sentiment, polarity, confidence, color = analyze(user_input)
-    timestamp = datetime.now().strftime("%H:%M:%S")
-
-    history.append({
-        "sentiment": sentiment,
-        "polarity": polarity,
-        "confidence": confidence,
-        "time": timestamp
-    })
-
-    print(f"{color}Sentiment  : {sentiment}")
-    print(f"{color}Polarity   : {polarity}")
-    print(f"{color}Confidence : {confidence}%\n")
+# ================= BATCH MODE =================
+
+def _score_chunk(texts, backend):
+    return get_backend(backend).polarities(texts)
+
+def score_stream(texts, chunk_size=500, workers=1, backend="textblob"):
+    """Yield the polarity of every text, in input order.
+
+    TextBlob's analyzer is pure Python, so throughput only scales by
+    spreading chunks over processes.  A few chunks are kept in flight,
+    bounding memory however long the input is.
+    """
+    chunks = chunked(texts, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _score_chunk(chunk, backend)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_chunk, chunk, backend))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def run_batch(args):
+    source = sys.stdin if args.batch == "-" else open(args.batch, newline="")
+    stats = RunningStats()
+    with source:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(("polarity", "sentiment", "confidence"))
+        texts = read_texts(source, args.format, args.field)
+        for polarity in score_stream(texts, args.chunk_size, args.workers, args.backend):
+            sentiment, _, confidence, _ = classify(polarity)
+            writer.writerow((polarity, sentiment, confidence))
+            stats.add(polarity)
+    show_stats(stats, file=sys.stderr)
+
+# Word pool for the benchmarks' random texts
+SAMPLE_TEXTS = [
+    "The food was absolutely delicious and the staff were friendly",
+    "I really love how fast the new update is",
+    "Great service, I will definitely come back",
+    "This is the best app I have used all year",
+    "The room was clean but a bit small",
+    "Delivery was on time, nothing special",
+    "I am not sure how I feel about the new design",
+    "It works, though the menu is confusing at first",
+    "The service was extremely slow and the waiter was rude",
+    "Terrible experience, the order arrived cold",
+    "This app crashes every time I open it",
+    "I am very disappointed with the support team",
+    "Never again, the worst meal I have ever had",
+    "Not bad at all, pretty good value for money",
+]
+
+def random_texts(n):
+    words = " ".join(SAMPLE_TEXTS).split()
+    return [" ".join(random.choices(words, k=random.randint(3, 12))) for _ in range(n)]
+
+def benchmark(n, chunk_size, backend="textblob"):
+    texts = random_texts(n)
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+
+    baseline = None
+    for workers in counts:
+        start = time.perf_counter()
+        scores = list(score_stream(texts, chunk_size, workers, backend))
+        rate = n / (time.perf_counter() - start)
+        if baseline is None:
+            baseline, expected = rate, scores
+        assert scores == expected
+        print(f"{workers:>3} processes : {rate:10,.0f} records/sec  ({rate / baseline:.2f}x)")
+
+def compare_backends(n, chunk_size):
+    """Throughput of each backend and how often the lexicon agrees with TextBlob."""
+    texts = random_texts(n)
+    results = {}
+    for name in BACKENDS:
+        start = time.perf_counter()
+        backend = get_backend(name)
+        loaded = time.perf_counter()
+        results[name] = list(score_stream(texts, chunk_size, 1, name))
+        rate = n / (time.perf_counter() - loaded)
+        print(f"{name:<9}: {rate:12,.0f} records/sec  (load {(loaded - start) * 1000:.0f} ms, version {backend.version})")
+
+    reference, fast = results["textblob"], results["lexicon"]
+    same_label = sum(classify(a)[0] == classify(b)[0] for a, b in zip(reference, fast))
+    exact = sum(a == b for a, b in zip(reference, fast))
+    error = sum(abs(a - b) for a, b in zip(reference, fast)) / n
+    print(f"Label agreement    : {same_label / n:.2%}")
+    print(f"Identical polarity : {exact / n:.2%}")
+    print(f"Mean |difference|  : {error:.4f}")
+
+def main(cache_file=None, history_file=HISTORY_FILE, backend="textblob"):
+    backend = get_backend(backend)
+    cache = PredictionCache(version=backend.version, path=cache_file, namespace=f"sentiment-{backend.name}")
+    session = RunningStats()
+    saved = load_stats(history_file)
+    log = HistoryLog(history_file)
+
+    print(f"{Fore.BLUE} {Style.BRIGHT} SENTIMENT SPY")
+    name = input(f"{Fore.MAGENTA}Enter your name: ").strip() or "Agent"
+    print(f"{Fore.CYAN}Welcome, {name}")
+    print(f"{Fore.CYAN}Commands: :help :stats :history :cache :reset :exit\n")
+
+    while True:
+        user_input = input(f"{Fore.GREEN}>> ").strip()
+
+        if not user_input:
+            print(f"{Fore.RED}Input required")
+            continue
+
+        if user_input.startswith(":"):
+            if user_input == ":exit":
+                cache.close()
+                log.close()
+                print(f"{Fore.BLUE}Session closed")
+                break
+            if user_input == ":help":
+                show_help()
+            elif user_input == ":stats":
+                show_stats(session)
+            elif user_input == ":history":
+                show_stats(saved)
+            elif user_input == ":cache":
+                show_cache(cache)
+            elif user_input == ":reset":
+                session = RunningStats()
+                print(f"{Fore.YELLOW}Session reset")
+            else:
+                print(f"{Fore.RED}Invalid command")
+            continue
+
+        sentiment, polarity, confidence, color = analyze(user_input, cache, backend)
+        session.add(polarity)
+        saved.add(polarity)
+        log.append(polarity)
+
+        print(f"{color}Sentiment  : {sentiment}")
+        print(f"{color}Polarity   : {polarity}")
+        print(f"{color}Confidence : {confidence}%\n")
+
+if __name__ == "__main__":
+    init(autoreset=True)
+    parser = argparse.ArgumentParser(description="Interactive sentiment analyzer")
+    parser.add_argument("--backend", choices=BACKENDS, default="textblob", help="lexicon is a faster NumPy scorer over the same word list")
+    parser.add_argument("--cache-file", help="keep the prediction cache in this SQLite file across runs")
+    parser.add_argument("--history-file", default=HISTORY_FILE, help="append-only log of scored polarities")
+    parser.add_argument("--stats", nargs="*", metavar="FILE", help="print the merged summary of history files and exit")
+    parser.add_argument("--batch", metavar="FILE", help="score every record in FILE (- for stdin) and write polarity,sentiment,confidence CSV")
+    parser.add_argument("--format", choices=("lines", "jsonl", "csv"), default="lines")
+    parser.add_argument("--field", default="text", help="JSONL key or CSV column holding the text")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--bench", type=int, metavar="N", help="measure records/sec on N texts for 1 up to all cores")
+    parser.add_argument("--bench-backends", type=int, metavar="N", help="compare backend throughput and agreement on N texts")
+    args = parser.parse_args()
+
+    if args.stats is not None:
+        show_stats(load_stats(*(args.stats or [args.history_file])))
+    elif args.bench:
+        benchmark(args.bench, args.chunk_size, args.backend)
+    elif args.bench_backends:
+        compare_backends(args.bench_backends, args.chunk_size)
+    elif args.batch:
+        run_batch(args)
+    else:
+        main(args.cache_file, args.history_file, args.backend)
@@ -0,0 +1,116 @@
+import math
+import os
+import struct
+import time
+from collections import deque
+
+HISTORY_FILE = "sentiment_history.bin"
+RECORD = struct.Struct("<dd")  # unix time, polarity
+WINDOWS = (10, 100)
+
+
+class Window:
+    """Mean of the last `size` values, kept up to date in O(1)."""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+
+    def add(self, value):
+        if len(self.values) == self.size:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else 0.0
+
+
+class RunningStats:
+    """Polarity summary updated in constant time per value.
+
+    Mean and variance use Welford's method, so no values are kept apart
+    from the rolling windows.  Two summaries combine with merge().
+    """
+
+    def __init__(self, windows=WINDOWS):
+        self.count = 0
+        self.positive = 0
+        self.negative = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.windows = [Window(size) for size in windows]
+
+    def add(self, polarity):
+        self.count += 1
+        self.positive += polarity > 0
+        self.negative += polarity < 0
+        delta = polarity - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (polarity - self.mean)
+        for window in self.windows:
+            window.add(polarity)
+
+    def merge(self, other):
+        """Fold in a summary of values that came after ours."""
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.positive += other.positive
+        self.negative += other.negative
+        for window, newer in zip(self.windows, other.windows):
+            for value in newer.values:
+                window.add(value)
+        return self
+
+    @property
+    def neutral(self):
+        return self.count - self.positive - self.negative
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+
+class HistoryLog:
+    """Append-only file of fixed-size (time, polarity) records."""
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self.file = open(path, "ab")
+
+    def append(self, polarity, when=None):
+        self.file.write(RECORD.pack(when or time.time(), polarity))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_history(path, block=RECORD.size * 4096):
+    """Yield (time, polarity) records; a torn record at the end is ignored."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        while data := f.read(block):
+            usable = len(data) - len(data) % RECORD.size
+            yield from RECORD.iter_unpack(data[:usable])
+
+
+def load_stats(*paths):
+    """One summary over every record in the given history files, in order."""
+    stats = RunningStats()
+    for path in paths:
+        for _, polarity in read_history(path):
+            stats.add(polarity)
+    return stats
@@ -0,0 +1,368 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from store import DB_FILE, RestaurantStore
+
+HOST = "127.0.0.1"
+PORT = 8765
+RESERVATION_TTL = 30
+# date, customer, phone, item, qty, price, total
+RECORD_TYPES = (str, str, str, str, int, (int, float), (int, float))
+
+
+class StockServer:
+    """Owns the menu stock for every till connected to it.
+
+    Stock is reserved in memory by the event loop, so reserve checks and
+    decrements never interleave.  Committed orders are queued and written
+    to the store by a single writer thread; whatever queues up while one
+    write is in flight goes out together in the next transaction.
+    """
+
+    def __init__(self, path=DB_FILE, host=HOST, port=PORT):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.writer = ThreadPoolExecutor(max_workers=1)
+        self.store = None
+        self.menu = {}
+        self.available = {}
+        self.reservations = {}
+        self.ids = itertools.count(1)
+        self.pending = []
+        self.flush_wakeup = None
+        self.clients = {}
+
+    async def write(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.writer, fn, *args)
+
+    async def start(self):
+        # The store is created on the writer thread, which is the only one touching it
+        self.store = await self.write(RestaurantStore, self.path)
+        self.menu = await self.write(self.store.load_menu)
+        self.available = {name: stock for name, (price, stock) in self.menu.items()}
+        self.flush_wakeup = asyncio.Event()
+        self.flusher = asyncio.create_task(self.flush_loop())
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        return self.server
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Stock server listening on {self.host}:{self.port}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        for writer in self.clients.values():
+            writer.close()
+        await asyncio.gather(*self.clients, return_exceptions=True)
+        self.flusher.cancel()
+        await asyncio.gather(self.flusher, return_exceptions=True)
+        await self.write(self.store.close)
+        self.writer.shutdown()
+
+    async def handle(self, reader, writer):
+        self.clients[asyncio.current_task()] = writer
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    response = await self.dispatch(request)
+                except (ValueError, KeyError, TypeError) as e:
+                    response = {"ok": False, "error": str(e)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self.clients[asyncio.current_task()]
+            writer.close()
+
+    async def dispatch(self, request):
+        op = request["op"]
+        if op == "menu":
+            return {"ok": True, "menu": self.menu}
+        if op == "reserve":
+            result = self.reserve(request["items"])
+            if not result["ok"]:
+                # Stock may have been added by a till writing to the database directly
+                await self.reload()
+                result = self.reserve(request["items"])
+            return result
+        if op == "release":
+            self.release(request["id"])
+            return {"ok": True}
+        if op == "commit":
+            return await self.commit(request["id"], request["records"])
+        if op == "save":
+            return await self.save(request["items"])
+        raise ValueError(f"Unknown op: {op}")
+
+    def expire(self):
+        now = time.monotonic()
+        for rid in [rid for rid, (_, expires) in self.reservations.items() if expires < now]:
+            self.release(rid)
+
+    def reserve(self, items):
+        self.expire()
+        if not isinstance(items, dict):
+            raise ValueError("items must map item names to quantities")
+        for item, qty in items.items():
+            if not isinstance(qty, int) or qty <= 0 or item not in self.available:
+                raise ValueError(f"Invalid item: {item}")
+            if self.available[item] < qty:
+                return {"ok": False, "error": f"Insufficient stock: {item}"}
+        for item, qty in items.items():
+            self.available[item] -= qty
+        rid = next(self.ids)
+        self.reservations[rid] = (items, time.monotonic() + RESERVATION_TTL)
+        return {"ok": True, "id": rid}
+
+    def release(self, rid):
+        items, _ = self.reservations.pop(rid, ({}, None))
+        for item, qty in items.items():
+            self.available[item] += qty
+
+    async def commit(self, rid, records):
+        if not isinstance(rid, int):
+            raise ValueError("id must be a reservation number")
+        if rid not in self.reservations:
+            return {"ok": False, "error": "Reservation expired"}
+        if not isinstance(records, list) or not records or not all(
+            isinstance(r, list) and len(r) == len(RECORD_TYPES)
+            and all(isinstance(v, t) for v, t in zip(r, RECORD_TYPES)) and r[4] > 0
+            for r in records
+        ):
+            # A malformed order must not fail the other tills' orders in its write batch
+            self.release(rid)
+            raise ValueError("records must be [date, customer, phone, item, qty, price, total] lists")
+        items, _ = self.reservations[rid]
+        ordered = Counter()
+        for r in records:
+            ordered[r[3]] += r[4]
+        if ordered != Counter(items):
+            return {"ok": False, "error": "Order does not match reservation"}
+
+        del self.reservations[rid]
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((records, items, future))
+        self.flush_wakeup.set()
+        error = await future
+        if error:
+            return {"ok": False, "error": error}
+        return {"ok": True}
+
+    async def flush_loop(self):
+        while True:
+            await self.flush_wakeup.wait()
+            self.flush_wakeup.clear()
+            if self.pending:
+                await self.flush()
+
+    async def flush(self):
+        batch, self.pending = self.pending, []
+        try:
+            results = await self.write(self.store.commit_orders, [records for records, _, _ in batch])
+        except sqlite3.Error as e:
+            results = [f"Storage error: {e}"] * len(batch)
+        for (records, items, future), error in zip(batch, results):
+            if error:
+                # Stock was changed behind our back; give the reservation back
+                for item, qty in items.items():
+                    self.available[item] += qty
+            else:
+                for item, qty in items.items():
+                    self.menu[item][1] -= qty
+            future.set_result(error)
+        if any(results):
+            await self.reload()
+
+    async def reload(self):
+        """Re-read the menu after restaurantcli or a direct-database till changed it.
+
+        Stock held by open reservations and by orders waiting to be written
+        stays unavailable.
+        """
+        self.menu = await self.write(self.store.load_menu)
+        held = Counter()
+        for items, _ in self.reservations.values():
+            held.update(items)
+        for _, items, _ in self.pending:
+            held.update(items)
+        self.available = {name: stock - held[name] for name, (price, stock) in self.menu.items()}
+
+    async def save(self, items):
+        if not isinstance(items, list) or not all(
+            isinstance(i, list) and len(i) == 3 and isinstance(i[0], str)
+            and isinstance(i[1], (int, float)) and isinstance(i[2], int)
+            for i in items
+        ):
+            raise ValueError("items must be [name, price, stock] lists")
+        await self.write(self.store.save_items, items)
+        for name, price, stock in items:
+            held = self.menu[name][1] - self.available[name] if name in self.menu else 0
+            self.menu[name] = [price, stock]
+            self.available[name] = stock - held
+        return {"ok": True}
+
+
+class StockClient:
+    """Blocking client for StockServer with the same menu/order methods as RestaurantStore."""
+
+    def __init__(self, host=HOST, port=PORT):
+        self.sock = socket.create_connection((host, port))
+        self.file = self.sock.makefile("rwb")
+
+    @classmethod
+    def from_address(cls, address):
+        host, _, port = address.rpartition(":")
+        return cls(host or HOST, int(port))
+
+    def call(self, op, **args):
+        self.file.write(json.dumps({"op": op, **args}).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Stock server closed the connection")
+        response = json.loads(line)
+        if not response.pop("ok"):
+            raise ValueError(response["error"])
+        return response
+
+    def load_menu(self):
+        return self.call("menu")["menu"]
+
+    def save_items(self, items):
+        self.call("save", items=[list(i) for i in items])
+
+    def commit_order(self, records):
+        records = [list(r) for r in records]
+        items = Counter()
+        for r in records:
+            items[r[3]] += r[4]
+        rid = self.call("reserve", items=items)["id"]
+        try:
+            self.call("commit", id=rid, records=records)
+        except ValueError:
+            self.call("release", id=rid)
+            raise
+
+    def close(self):
+        self.sock.close()
+
+
+# ================= LOAD TEST =================
+
+def percentile(values, q):
+    """The q-th quantile (0..1) of sorted values, by nearest rank."""
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def till(address, menu, seconds, latencies, outcomes):
+    done = Counter()
+    client = StockClient.from_address(address)
+    items = list(menu)
+    today = date.today().isoformat()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        records = []
+        for item in random.sample(items, random.randint(1, 3)):
+            qty = random.randint(1, 3)
+            price = menu[item][0]
+            records.append((today, "Load Test", "0000", item, qty, price, qty * price))
+        start = time.perf_counter()
+        try:
+            client.commit_order(records)
+            done["ok"] += 1
+        except ValueError:
+            done["rejected"] += 1
+        latencies.append(time.perf_counter() - start)
+    client.close()
+    outcomes.append(done)
+
+
+def load_test(tills, seconds, items=50, stock=2000):
+    """Run N simulated tills against a server on a scratch database."""
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "loadtest.db")
+    store = RestaurantStore(path)
+    store.save_items((f"Item {i}", 100.0, stock) for i in range(items))
+    start_menu = store.load_menu()
+    store.close()
+
+    server = StockServer(path, port=0)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    port = server.server.sockets[0].getsockname()[1]
+
+    latencies, outcomes = [], []
+    threads = [
+        threading.Thread(target=till, args=(f"{HOST}:{port}", start_menu, seconds, latencies, outcomes))
+        for _ in range(tills)
+    ]
+    begin = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - begin
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+    store = RestaurantStore(path)
+    end_menu = store.load_menu()
+    sold = Counter()
+    for row in store.since(0):
+        sold[row[4]] += row[5]
+    oversold = [n for n in start_menu if end_menu[n][1] < 0 or end_menu[n][1] != start_menu[n][1] - sold[n]]
+    store.close()
+    tmp.cleanup()
+
+    outcomes = sum(outcomes, Counter())
+    latencies.sort()
+    print(f"Tills        : {tills}")
+    print(f"Orders       : {outcomes['ok']} committed, {outcomes['rejected']} rejected")
+    print(f"Throughput   : {sum(outcomes.values()) / elapsed:.1f} orders/sec")
+    if latencies:
+        print(f"Latency p50  : {statistics.median(latencies) * 1000:.2f} ms")
+        print(f"Latency p99  : {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"Stock check  : {'FAILED ' + ', '.join(oversold) if oversold else 'consistent'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared stock service for restaurant tills")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--loadtest", type=int, metavar="TILLS", help="simulate TILLS concurrent tills and exit")
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    if args.loadtest:
+        load_test(args.loadtest, args.seconds)
+    else:
+        asyncio.run(StockServer(args.db, args.host, args.port).serve_forever())
@@ -0,0 +1,278 @@
+import os
+import sqlite3
+from datetime import date
+
+TAX_RATE = 1.065
+DB_FILE = "restaurant.db"
+
+SALES_COLUMNS = "id, date, customer, phone, item, qty, price, total"
+
+
+def build_order(menu, customer, phone, quantities, day=None):
+    """Sales records and bill total for {item: qty} against a {name: [price, stock]} menu.
+
+    Raises ValueError with a message fit for the user if the order cannot
+    be placed; zero quantities are ignored.
+    """
+    if not customer or not phone:
+        raise ValueError("Customer details required")
+    day = day or date.today().isoformat()
+    records = []
+    total = 0
+    for item, qty in quantities.items():
+        if qty > 0:
+            if item not in menu:
+                raise ValueError(f"Unknown item: {item}")
+            price, stock = menu[item]
+            if qty > stock:
+                raise ValueError(f"Insufficient stock: {item}")
+            cost = qty * price
+            total += cost
+            records.append((day, customer, phone, item, qty, price, cost))
+    if not records:
+        raise ValueError("No items selected")
+    return records, total
+
+
+class RestaurantStore:
+    """Menu, stock and the sales log kept in one SQLite database.
+
+    The database runs in write-ahead-log mode, so a crash mid-write never
+    truncates the menu, and an order's sales rows and stock decrements are
+    committed in a single transaction.  Sales rows get monotonically
+    increasing ids, so callers can ask for "everything after the last row
+    I saw" instead of re-reading the log.
+    """
+
+    def __init__(self, path=DB_FILE, legacy_menu=None, legacy_sales=None):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        had_meta = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'meta'").fetchone()
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key   TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS menu (
+                id    INTEGER PRIMARY KEY,
+                name  TEXT    NOT NULL UNIQUE,
+                price REAL    NOT NULL,
+                stock INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sales (
+                id       INTEGER PRIMARY KEY,
+                date     TEXT    NOT NULL,
+                customer TEXT    NOT NULL,
+                phone    TEXT    NOT NULL,
+                item     TEXT    NOT NULL,
+                qty      INTEGER NOT NULL,
+                price    REAL    NOT NULL,
+                total    REAL    NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(date);
+            CREATE INDEX IF NOT EXISTS idx_sales_item ON sales(item, date);
+        """)
+        if not had_meta and self.conn.execute("SELECT EXISTS (SELECT 1 FROM sales) OR EXISTS (SELECT 1 FROM menu)").fetchone()[0]:
+            # Databases from before the meta table ran the import when they were created
+            with self.conn:
+                self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('legacy_imported', datetime('now'))")
+        if legacy_menu or legacy_sales:
+            self.import_legacy(legacy_menu, legacy_sales)
+
+    def import_legacy(self, menu_file=None, sales_file=None):
+        """One-off import of the old pipe-separated menu.txt and sales.txt.
+
+        Both files and the flag recording the import are written in one
+        transaction, so a crash part way leaves nothing behind and the next
+        start simply imports again.  Returns True if this call imported.
+        """
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+                return False
+            if menu_file and os.path.exists(menu_file):
+                with open(menu_file) as f:
+                    rows = (line.strip().split("|") for line in f if line.strip())
+                    self._save_items((n, float(p), int(s)) for n, p, s in rows)
+            if sales_file and os.path.exists(sales_file):
+                with open(sales_file) as f:
+                    self._insert_sales(line.strip().split("|") for line in f if line.strip())
+            self.conn.execute("INSERT INTO meta VALUES ('legacy_imported', datetime('now'))")
+        return True
+
+    # ---------------- menu ----------------
+
+    def load_menu(self):
+        """The menu as {name: [price, stock]} in insertion order."""
+        rows = self.conn.execute("SELECT name, price, stock FROM menu ORDER BY id")
+        return {name: [price, stock] for name, price, stock in rows}
+
+    def save_items(self, items):
+        """Insert or update (name, price, stock) rows; only these rows are written."""
+        with self.conn:
+            self._save_items(items)
+
+    def _save_items(self, items):
+        self.conn.executemany(
+            "INSERT INTO menu (name, price, stock) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET price = excluded.price, stock = excluded.stock",
+            items
+        )
+
+    def update_items(self, rows, stock_delta=False):
+        """Apply (name, price, stock) updates in one transaction; None leaves a field as is.
+
+        With stock_delta the stock value is added to the current stock.
+        Returns the number of rows that matched an existing item.
+        """
+        stock_sql = "stock + COALESCE(?, 0)" if stock_delta else "COALESCE(?, stock)"
+        with self.conn:
+            cur = self.conn.executemany(
+                f"UPDATE menu SET price = COALESCE(?, price), stock = {stock_sql} WHERE name = ?",
+                ((price, stock, name) for name, price, stock in rows)
+            )
+        return cur.rowcount
+
+    def commit_order(self, records):
+        """Record an order's sales rows and take their qty off stock atomically.
+
+        Raises ValueError, leaving nothing written, if any item is short.
+        """
+        error = self.commit_orders([records])[0]
+        if error:
+            raise ValueError(error)
+
+    def commit_orders(self, orders):
+        """Commit several orders in one transaction, each under its own savepoint.
+
+        An order that is short on stock is rolled back on its own without
+        affecting the others.  Returns None or an error message per order.
+        """
+        results = []
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            for records in orders:
+                self.conn.execute("SAVEPOINT order_commit")
+                try:
+                    self._take_stock(records)
+                    self._insert_sales(records)
+                except ValueError as e:
+                    self.conn.execute("ROLLBACK TO order_commit")
+                    results.append(str(e))
+                else:
+                    results.append(None)
+                self.conn.execute("RELEASE order_commit")
+        return results
+
+    def _take_stock(self, records):
+        for r in records:
+            item, qty = r[3], r[4]
+            cur = self.conn.execute(
+                "UPDATE menu SET stock = stock - ? WHERE name = ? AND stock >= ?",
+                (qty, item, qty)
+            )
+            if cur.rowcount == 0:
+                raise ValueError(f"Insufficient stock: {item}")
+
+    # ---------------- sales ----------------
+
+    def _insert_sales(self, records):
+        return self.conn.executemany(
+            "INSERT INTO sales (date, customer, phone, item, qty, price, total) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            records
+        ).rowcount
+
+    def append(self, records):
+        """Append (date, customer, phone, item, qty, price, total) records."""
+        with self.conn:
+            return self._insert_sales(records)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+
+    def last_id(self):
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM sales").fetchone()[0]
+
+    def data_version(self):
+        """A number that changes whenever another connection commits to the database."""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def since(self, last_id):
+        """Rows with id greater than last_id, oldest first."""
+        return self.conn.execute(
+            f"SELECT {SALES_COLUMNS} FROM sales WHERE id > ? ORDER BY id",
+            (last_id,)
+        )
+
+    def item_totals_by_day(self, up_to_id):
+        """(date, item, qty, total) summed per day and item over rows with id <= up_to_id."""
+        # Grouping in (item, date) order walks idx_sales_item instead of sorting
+        return self.conn.execute(
+            "SELECT date, item, SUM(qty), SUM(total) FROM sales WHERE id <= ? GROUP BY item, date",
+            (up_to_id,)
+        )
+
+    def customer_totals(self, start=None, end=None, up_to_id=None):
+        """(customer, phone, total) per customer, filtered like query() and by id <= up_to_id."""
+        sql = "SELECT customer, phone, SUM(total) FROM sales"
+        where, args = [], []
+        if start:
+            where.append("date >= ?")
+            args.append(start)
+        if end:
+            where.append("date <= ?")
+            args.append(end)
+        if up_to_id is not None:
+            where.append("id <= ?")
+            args.append(up_to_id)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self.conn.execute(sql + " GROUP BY customer, phone", args)
+
+    def page(self, after_id, limit):
+        """Up to limit rows with id greater than after_id, for paged views.
+
+        Seeking on the primary key costs the same however deep the page is,
+        unlike LIMIT/OFFSET which walks every skipped row.
+        """
+        return self.conn.execute(
+            f"SELECT {SALES_COLUMNS} FROM sales WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)
+        ).fetchall()
+
+    def id_before(self, offset, count):
+        """The after_id for page() that starts at row number offset; count is count().
+
+        Sales rows are never deleted, so ids are normally 1..count and this
+        is a single index lookup; otherwise it falls back to walking ids.
+        """
+        if offset <= 0:
+            return 0
+        first, last = self.conn.execute("SELECT MIN(id), MAX(id) FROM sales").fetchone()
+        if first is not None and last - first + 1 == count:
+            return first + offset - 1
+        row = self.conn.execute("SELECT id FROM sales ORDER BY id LIMIT 1 OFFSET ?", (offset - 1,)).fetchone()
+        return row[0] if row else self.last_id()
+
+    def query(self, start=None, end=None, item=None):
+        """Rows filtered by inclusive ISO date range and/or item name."""
+        sql = f"SELECT {SALES_COLUMNS} FROM sales"
+        where, args = [], []
+        if start:
+            where.append("date >= ?")
+            args.append(start)
+        if end:
+            where.append("date <= ?")
+            args.append(end)
+        if item:
+            where.append("item = ?")
+            args.append(item)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self.conn.execute(sql + " ORDER BY id", args)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,23 @@
+import csv
+import json
+from itertools import islice
+
+
+def read_texts(f, fmt="lines", field="text"):
+    """Yield the texts of a batch input: one per line, or a field of JSONL/CSV records."""
+    if fmt == "jsonl":
+        for line in f:
+            if line.strip():
+                yield str(json.loads(line)[field])
+    elif fmt == "csv":
+        for row in csv.DictReader(f):
+            yield row[field]
+    else:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
@@ -1,11 +1,20 @@
+import argparse
+import csv
+import json
+import pickle
+import random
 import sys
-import joblib
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 from colorama import Fore, Style, init
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
 
-init(autoreset=True)
+from predcache import PredictionCache, file_version, normalize
+from textbatch import chunked, read_texts
+from textscore import MODEL_FILE, VOCAB_FILE
+
 
 INTENT_LABELS = [
     "Complaint",
@@ -94,7 +103,14 @@ TRAINING_DATA = [
     ("Looking forward to updates", "General_Conversation")
 ]
 
+# sklearn and joblib are imported only where a model is trained or unpickled,
+# so tools that use the exported model never pay for them
+
 def train_model():
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+
     texts = [x[0] for x in TRAINING_DATA]
     labels = [x[1] for x in TRAINING_DATA]
 
@@ -106,18 +122,46 @@ def train_model():
 
     joblib.dump(vectorizer, "vectorizer.pkl")
     joblib.dump(model, "intent_model.pkl")
+    export_model(vectorizer, model)
+
+def export_model(vectorizer, model, model_file=MODEL_FILE, vocab_file=VOCAB_FILE):
+    """Write the compact model format read by textscore.IntentScorer."""
+    if (vectorizer.analyzer != "word" or vectorizer.tokenizer or vectorizer.preprocessor
+            or vectorizer.strip_accents or vectorizer.stop_words
+            or vectorizer.sublinear_tf or vectorizer.norm != "l2"):
+        raise ValueError("Only plain word n-gram TF-IDF vectorizers can be exported")
+
+    table = np.column_stack([vectorizer.idf_, model.feature_log_prob_.T])
+    np.save(model_file, table)
+    with open(vocab_file, "w") as f:
+        json.dump({
+            "vocabulary": {term: int(i) for term, i in vectorizer.vocabulary_.items()},
+            "classes": [str(c) for c in model.classes_],
+            "class_log_prior": model.class_log_prior_.tolist(),
+            "ngram_range": list(vectorizer.ngram_range),
+            "lowercase": vectorizer.lowercase,
+            "token_pattern": vectorizer.token_pattern,
+        }, f)
 
 def load_model():
+    import joblib
+
     try:
         vectorizer = joblib.load("vectorizer.pkl")
         model = joblib.load("intent_model.pkl")
         return vectorizer, model
-    except:
-        print(Fore.YELLOW + "Training local NLP model...")
+    except (OSError, EOFError, pickle.UnpicklingError):
+        print(Fore.YELLOW + "Training local NLP model...", file=sys.stderr)
         train_model()
         return load_model()
 
-def analyze(text, vectorizer, model):
+def model_version():
+    return "intent-" + file_version("vectorizer.pkl", "intent_model.pkl")
+
+def analyze(text, vectorizer, model, cache=None):
+    if cache is not None:
+        return tuple(cache.get_or_compute(text, lambda t: analyze(t, vectorizer, model)))
+
     X = vectorizer.transform([text])
     if X.nnz == 0:
         return "General_Conversation", 0.0
@@ -126,19 +170,101 @@ def analyze(text, vectorizer, model):
     idx = np.argmax(probs)
     return model.classes_[idx], round(probs[idx] * 100, 2)
 
+def analyze_batch(texts, vectorizer, model):
+    X = vectorizer.transform(texts)
+    probs = model.predict_proba(X)
+    idx = probs.argmax(axis=1)
+    confidence = np.round(probs[np.arange(len(idx)), idx] * 100, 2)
+    labels = model.classes_[idx]
+    empty = X.getnnz(axis=1) == 0
+    return [
+        ("General_Conversation", 0.0) if e else (str(label), float(c))
+        for label, c, e in zip(labels, confidence, empty)
+    ]
+
+# ================= BATCH MODE =================
+
+_worker_model = None
+
+def _init_worker():
+    global _worker_model
+    _worker_model = load_model()
+
+def _classify_chunk(texts):
+    return analyze_batch(texts, *_worker_model)
 
-def main():
+def classify_stream(texts, chunk_size=5000, workers=1):
+    """Yield (label, confidence) for every text, in input order.
+
+    Texts are vectorized a whole chunk at a time.  With workers > 1 the
+    chunks are spread over a process pool, keeping only a few chunks in
+    flight so memory stays bounded however long the input is.
+    """
+    chunks = chunked(texts, chunk_size)
+    if workers <= 1:
+        vectorizer, model = load_model()
+        for chunk in chunks:
+            yield from analyze_batch(chunk, vectorizer, model)
+        return
+
+    load_model()  # make sure the pickles exist before workers try to load them
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_classify_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def run_batch(args):
+    source = sys.stdin if args.batch == "-" else open(args.batch, newline="")
+    with source:
+        writer = csv.writer(sys.stdout)
+        texts = read_texts(source, args.format, args.field)
+        for label, confidence in classify_stream(texts, args.chunk_size, args.workers):
+            writer.writerow((label, confidence))
+
+def benchmark(n, chunk_size, workers):
+    words = " ".join(t for t, _ in TRAINING_DATA).split()
+    texts = [" ".join(random.choices(words, k=random.randint(3, 12))) for _ in range(n)]
+    vectorizer, model = load_model()
+
+    start = time.perf_counter()
+    single = [analyze(t, vectorizer, model) for t in texts[:min(n, 2000)]]
+    per_line = len(single) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batch = list(classify_stream(texts, chunk_size, 1))
+    batched = n / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    pooled = list(classify_stream(texts, chunk_size, workers))
+    parallel = n / (time.perf_counter() - start)
+
+    assert [l for l, _ in batch[:len(single)]] == [l for l, _ in single]
+    assert batch == pooled
+    print(f"Per-line analyze   : {per_line:12,.0f} texts/sec")
+    print(f"Batch, 1 process   : {batched:12,.0f} texts/sec")
+    print(f"Batch, {workers} processes : {parallel:12,.0f} texts/sec")
+
+
+def main(cache_file=None):
     print(Fore.CYAN + Style.BRIGHT + "\nTEXT INTENT CLASSIFIER")
     print(Fore.CYAN + "-" * 55)
     print(Fore.YELLOW + "NLP system for general conversation")
     print(Fore.YELLOW + "Type 'exit' to close\n")
 
     vectorizer, model = load_model()
+    cache = PredictionCache(version=model_version(), path=cache_file, namespace="intent", normalize=normalize)
 
     while True:
         text = input(Fore.WHITE + "Input Text: ").strip()
 
         if text.lower() == "exit":
+            stats = cache.stats()
+            cache.close()
+            print(Fore.CYAN + f"\nCache hit rate {stats['hit_rate']:.0%}, {stats['saved_ms']} ms saved")
             print(Fore.CYAN + "\nSystem terminated successfully.\n")
             sys.exit()
 
@@ -146,7 +272,7 @@ def main():
             print(Fore.RED + "Input cannot be empty.\n")
             continue
 
-        label, confidence = analyze(text, vectorizer, model)
+        label, confidence = analyze(text, vectorizer, model, cache)
 
         print(Fore.GREEN + Style.BRIGHT + "\nClassification Result")
         print(Fore.GREEN + "-" * 55)
@@ -154,4 +280,24 @@ def main():
         print(f"Confidence      : {confidence}%\n")
 
 if __name__ == "__main__":
-    main()
+    init(autoreset=True)
+    parser = argparse.ArgumentParser(description="Text intent classifier")
+    parser.add_argument("--batch", metavar="FILE", help="classify every record in FILE (- for stdin) and write label,confidence CSV")
+    parser.add_argument("--format", choices=("lines", "jsonl", "csv"), default="lines")
+    parser.add_argument("--field", default="text", help="JSONL key or CSV column holding the text")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--bench", type=int, metavar="N", help="compare per-line and batch throughput on N texts")
+    parser.add_argument("--export", action="store_true", help=f"write {MODEL_FILE}/{VOCAB_FILE} for textscore.py")
+    parser.add_argument("--cache-file", help="keep the interactive prediction cache in this SQLite file across runs")
+    args = parser.parse_args()
+
+    if args.export:
+        export_model(*load_model())
+        print(f"Exported {MODEL_FILE} and {VOCAB_FILE}")
+    elif args.bench:
+        benchmark(args.bench, args.chunk_size, max(args.workers, 2))
+    elif args.batch:
+        run_batch(args)
+    else:
+        main(args.cache_file)
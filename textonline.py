@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import joblib
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+from textclass import INTENT_LABELS, TRAINING_DATA, analyze
+
+EXAMPLES_FILE = "intent_labeled.jsonl"
+SNAPSHOT_DIR = "intent_snapshots"
+KEEP_SNAPSHOTS = 5
+
+
+def make_vectorizer():
+    # Hashing needs no fitted vocabulary, so new words never force a refit
+    return HashingVectorizer(ngram_range=(1, 2), n_features=2 ** 16, alternate_sign=False, norm="l2")
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on path across processes while the block runs."""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ExampleStore:
+    """Append-only JSONL log of labeled corrections."""
+
+    def __init__(self, path=EXAMPLES_FILE):
+        self.path = path
+
+    def append(self, examples):
+        with open(self.path, "a") as f:
+            for text, label in examples:
+                f.write(json.dumps({"text": text, "label": label, "time": datetime.now().isoformat()}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __iter__(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record["text"], record["label"]
+
+
+class OnlineIntentModel:
+    """Intent model updated with partial_fit and saved as versioned snapshots.
+
+    Each learn() call vectorizes and fits only the new examples, then
+    writes snapshot N+1 and repoints CURRENT at it with os.replace, so a
+    reader always sees either the old or the new model, never a partial
+    one.  Processes holding a model call refresh() to pick up new versions.
+    Writers take a lock file and refresh first, so concurrent learners
+    each build on the other's latest snapshot instead of overwriting it.
+    """
+
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR, store=None):
+        self.snapshot_dir = snapshot_dir
+        self.store = store or ExampleStore()
+        self.vectorizer = make_vectorizer()
+        self.model = None
+        self.version = 0
+        os.makedirs(snapshot_dir, exist_ok=True)
+        if not self.refresh():
+            with self.lock():
+                if not self.refresh():
+                    self.bootstrap()
+
+    @property
+    def current_file(self):
+        return os.path.join(self.snapshot_dir, "CURRENT")
+
+    def lock(self):
+        return file_lock(os.path.join(self.snapshot_dir, "LOCK"))
+
+    def snapshot_path(self, version):
+        return os.path.join(self.snapshot_dir, f"model-{version:06d}.pkl")
+
+    def current_version(self):
+        try:
+            with open(self.current_file) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return 0
+
+    def refresh(self):
+        """Load the newest snapshot if it is newer than ours; True if one was loaded."""
+        version = self.current_version()
+        if version <= self.version:
+            return False
+        self.model = joblib.load(self.snapshot_path(version))
+        self.version = version
+        return True
+
+    def bootstrap(self):
+        self.model = MultinomialNB(alpha=1.5)
+        self._fit(TRAINING_DATA + list(self.store))
+        self.save()
+
+    def _fit(self, examples):
+        texts = [text for text, _ in examples]
+        labels = [label for _, label in examples]
+        self.model.partial_fit(self.vectorizer.transform(texts), labels, classes=INTENT_LABELS)
+
+    def learn(self, examples):
+        """Record labeled examples and fold them into a new model version."""
+        examples = [(str(text), label) for text, label in examples]
+        for _, label in examples:
+            if label not in INTENT_LABELS:
+                raise ValueError(f"Unknown label: {label}")
+        if not examples:
+            return self.version
+        with self.lock():
+            self.refresh()
+            self.store.append(examples)
+            self._fit(examples)
+            return self.save()
+
+    def save(self):
+        """Write the next snapshot and point CURRENT at it; call with lock() held."""
+        version = max(self.version, self.current_version()) + 1
+        path = self.snapshot_path(version)
+        with open(path + ".tmp", "wb") as f:
+            joblib.dump(self.model, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+        fd, tmp = tempfile.mkstemp(dir=self.snapshot_dir)
+        with os.fdopen(fd, "w") as f:
+            f.write(str(version))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.current_file)
+        self.version = version
+
+        for old in range(version - KEEP_SNAPSHOTS, 0, -1):
+            if not os.path.exists(self.snapshot_path(old)):
+                break
+            os.remove(self.snapshot_path(old))
+        return version
+
+    def analyze(self, text):
+        return analyze(text, self.vectorizer, self.model)
+
+
+def benchmark(sizes=(1000, 10000, 100000), batch=20):
+    """Show that an online update costs the same however large the corpus is."""
+    words = " ".join(t for t, _ in TRAINING_DATA).split()
+
+    def examples(n):
+        return [(" ".join(random.choices(words, k=random.randint(3, 12))), random.choice(INTENT_LABELS))
+                for _ in range(n)]
+
+    print(f"{'Corpus':>8} {'Online update':>15} {'Full refit':>12}")
+    for n in sizes:
+        corpus = examples(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            model = OnlineIntentModel(os.path.join(tmp, "snapshots"), ExampleStore(os.path.join(tmp, "labeled.jsonl")))
+            model._fit(corpus)
+
+            corrections = examples(batch)
+            start = time.perf_counter()
+            model.learn(corrections)
+            online = time.perf_counter() - start
+
+        texts = [t for t, _ in corpus + corrections]
+        labels = [label for _, label in corpus + corrections]
+        start = time.perf_counter()
+        MultinomialNB(alpha=1.5).fit(TfidfVectorizer(ngram_range=(1, 2)).fit_transform(texts), labels)
+        refit = time.perf_counter() - start
+        print(f"{n:>8} {online * 1000:>12.1f} ms {refit * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Online retraining for the intent classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("learn", help="add one labeled example")
+    p.add_argument("text")
+    p.add_argument("label", choices=INTENT_LABELS)
+    p = commands.add_parser("learn-file", help="add labeled examples from JSONL with text/label keys")
+    p.add_argument("file")
+    p = commands.add_parser("classify")
+    p.add_argument("text")
+    commands.add_parser("bench", help="compare update cost with a full refit across corpus sizes")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        benchmark()
+    else:
+        model = OnlineIntentModel()
+        if args.command == "learn":
+            print(f"Model version {model.learn([(args.text, args.label)])}")
+        elif args.command == "learn-file":
+            with open(args.file) as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            print(f"Model version {model.learn((r['text'], r['label']) for r in rows)}")
+        else:
+            label, confidence = model.analyze(args.text)
+            print(f"Predicted Label : {label}")
+            print(f"Confidence      : {confidence}%")
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+MODEL_FILE = "intent_model.npy"
+VOCAB_FILE = "intent_vocab.json"
+
+
+class IntentScorer:
+    """Scores text with an exported TF-IDF + Naive Bayes model, without sklearn.
+
+    MODEL_FILE holds one row per vocabulary term: its IDF followed by the
+    term's log-probability under each class, and is memory-mapped rather
+    than read.  VOCAB_FILE holds the term -> row table, the class names and
+    priors, and the tokenizer settings the vectorizer was trained with.
+    """
+
+    def __init__(self, model_file=MODEL_FILE, vocab_file=VOCAB_FILE):
+        with open(vocab_file) as f:
+            meta = json.load(f)
+        self.vocab = meta["vocabulary"]
+        self.classes = meta["classes"]
+        self.prior = np.array(meta["class_log_prior"])
+        self.min_n, self.max_n = meta["ngram_range"]
+        self.lowercase = meta["lowercase"]
+        self.token = re.compile(meta["token_pattern"])
+
+        table = np.load(model_file, mmap_mode="r")
+        self.idf = table[:, 0]
+        self.log_prob = table[:, 1:]
+
+    def features(self, text):
+        """{row: count} for the vocabulary n-grams in text, as TfidfVectorizer builds them."""
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token.findall(text)
+        counts = {}
+        for n in range(self.min_n, self.max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                row = self.vocab.get(" ".join(tokens[i:i + n]))
+                if row is not None:
+                    counts[row] = counts.get(row, 0) + 1
+        return counts
+
+    def analyze(self, text):
+        counts = self.features(text)
+        if not counts:
+            return "General_Conversation", 0.0
+
+        rows = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        x = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self.idf[rows]
+        x /= np.sqrt(x @ x)
+        jll = x @ self.log_prob[rows] + self.prior
+        probs = np.exp(jll - jll.max())
+        probs /= probs.sum()
+        idx = int(probs.argmax())
+        return self.classes[idx], round(float(probs[idx]) * 100, 2)
+
+
+def bench_startup(runs=5):
+    """Wall time of a fresh process that loads a model and classifies one text."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=here)
+    commands = {
+        "joblib + sklearn": [sys.executable, "-c",
+                             "import textclass; v, m = textclass.load_model(); textclass.analyze('hello there', v, m)"],
+        "exported scorer": [sys.executable, os.path.join(here, "textscore.py"), "hello there"],
+    }
+    for name, cmd in commands.items():
+        subprocess.run(cmd, env=env, check=True, capture_output=True)
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(cmd, env=env, check=True, capture_output=True)
+            timings.append(time.perf_counter() - start)
+        print(f"{name:<18}: best {min(timings) * 1000:7.1f} ms, mean {sum(timings) / runs * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fast-start intent scorer for exported models")
+    parser.add_argument("text", nargs="*", help="text to classify; reads lines from stdin if omitted")
+    parser.add_argument("--bench-startup", action="store_true", help="compare process startup with the joblib path")
+    args = parser.parse_args()
+
+    if args.bench_startup:
+        bench_startup()
+    else:
+        scorer = IntentScorer()
+        lines = [" ".join(args.text)] if args.text else (line.rstrip("\n") for line in sys.stdin)
+        for line in lines:
+            label, confidence = scorer.analyze(line)
+            print(f"{label},{confidence}")
@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import json
+import random
+import socket
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from textclass import TRAINING_DATA, analyze_batch, load_model
+
+HOST = "127.0.0.1"
+PORT = 8766
+MAX_BATCH = 256
+LATENCY_WINDOW = 10000
+
+
+class ClassifierServer:
+    """Keeps the vectorizer and model loaded and scores requests in micro-batches.
+
+    Requests are queued by the connection handlers.  While one batch is
+    being scored on the model thread, new requests pile up and go out
+    together in the next predict_proba call.
+    """
+
+    def __init__(self, host=HOST, port=PORT):
+        self.host = host
+        self.port = port
+        self.model_thread = ThreadPoolExecutor(max_workers=1)
+        self.queue = deque()
+        self.wakeup = None
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.batches = 0
+        self.clients = {}
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.vectorizer, self.model = await loop.run_in_executor(self.model_thread, load_model)
+        self.wakeup = asyncio.Event()
+        self.batcher = asyncio.create_task(self.batch_loop())
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        return self.server
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Classifier listening on {self.host}:{self.port}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        for writer in self.clients.values():
+            writer.close()
+        await asyncio.gather(*self.clients, return_exceptions=True)
+        self.batcher.cancel()
+        await asyncio.gather(self.batcher, return_exceptions=True)
+        self.model_thread.shutdown()
+
+    async def handle(self, reader, writer):
+        self.clients[asyncio.current_task()] = writer
+        try:
+            while line := await reader.readline():
+                try:
+                    response = await self.dispatch(json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    response = {"ok": False, "error": str(e)}
+                except Exception as e:
+                    response = {"ok": False, "error": f"Internal error: {type(e).__name__}: {e}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self.clients[asyncio.current_task()]
+            writer.close()
+
+    async def dispatch(self, request):
+        op = request["op"]
+        if op == "classify":
+            if "texts" in request:
+                results = await self.classify([str(t) for t in request["texts"]])
+                return {"ok": True, "results": results}
+            label, confidence = (await self.classify([str(request["text"])]))[0]
+            return {"ok": True, "label": label, "confidence": confidence}
+        if op == "metrics":
+            return {"ok": True, **self.metrics()}
+        raise ValueError(f"Unknown op: {op}")
+
+    async def classify(self, texts):
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.append((texts, future))
+        self.wakeup.set()
+        results = await future
+        self.latencies.append(time.perf_counter() - start)
+        self.requests += 1
+        return results
+
+    async def batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self.queue:
+                batch, texts = [], []
+                while self.queue and len(texts) < MAX_BATCH:
+                    request_texts, future = self.queue.popleft()
+                    batch.append((len(request_texts), future))
+                    texts.extend(request_texts)
+                try:
+                    results = await loop.run_in_executor(
+                        self.model_thread, analyze_batch, texts, self.vectorizer, self.model
+                    )
+                except Exception as e:
+                    # Fail this batch's requests and keep serving; a dead
+                    # batcher would leave every later request waiting forever
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                self.batches += 1
+                i = 0
+                for n, future in batch:
+                    if not future.done():
+                        future.set_result(results[i:i + n])
+                    i += n
+
+    def metrics(self):
+        """Request and batch counts, and latency percentiles (None before any request)."""
+        latencies = sorted(self.latencies)
+        p50 = p99 = None
+        if latencies:
+            p50 = round(statistics.median(latencies) * 1000, 3)
+            p99 = round(latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000, 3)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": round(self.requests / max(self.batches, 1), 2),
+            "p50_ms": p50,
+            "p99_ms": p99,
+        }
+
+
+class ClassifierClient:
+    """Blocking client for ClassifierServer."""
+
+    def __init__(self, host=HOST, port=PORT):
+        self.sock = socket.create_connection((host, port))
+        self.file = self.sock.makefile("rwb")
+
+    def call(self, op, **args):
+        self.file.write(json.dumps({"op": op, **args}).encode() + b"\n")
+        self.file.flush()
+        response = json.loads(self.file.readline())
+        if not response.pop("ok"):
+            raise ValueError(response["error"])
+        return response
+
+    def classify(self, text):
+        response = self.call("classify", text=text)
+        return response["label"], response["confidence"]
+
+    def classify_many(self, texts):
+        return [tuple(r) for r in self.call("classify", texts=texts)["results"]]
+
+    def metrics(self):
+        return self.call("metrics")
+
+    def close(self):
+        self.sock.close()
+
+
+def load_test(clients, seconds):
+    """Run N clients sending one text per request against an in-process server."""
+    server = ClassifierServer(port=0)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    port = server.server.sockets[0].getsockname()[1]
+    words = " ".join(t for t, _ in TRAINING_DATA).split()
+
+    def client():
+        c = ClassifierClient(HOST, port)
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            c.classify(" ".join(random.choices(words, k=random.randint(3, 12))))
+        c.close()
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    begin = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - begin
+
+    m = server.metrics()
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    print(f"Clients      : {clients}")
+    print(f"Throughput   : {m['requests'] / elapsed:,.0f} requests/sec")
+    print(f"Mean batch   : {m['mean_batch']}")
+    print(f"Latency p50  : {m['p50_ms']} ms")
+    print(f"Latency p99  : {m['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-running intent classification server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--loadtest", type=int, metavar="CLIENTS", help="simulate CLIENTS concurrent callers and exit")
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    if args.loadtest:
+        load_test(args.loadtest, args.seconds)
+    else:
+        asyncio.run(ClassifierServer(args.host, args.port).serve_forever())
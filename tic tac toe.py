@@ -66,3 +66,39 @@ def player_move(board, player_symbol):
                 break
         except ValueError:
             print(Fore.RED + "Invalid input. Please enter a numeric value.")
+
+def main(level="hard"):
+    from tttsolver import solver_move
+
+    board = [str(i) for i in range(1, 10)]
+    player_symbol, ai_symbol = "X", "O"
+
+    print(Fore.CYAN + Style.BRIGHT + f"TIC TAC TOE ({level})")
+    display_board(board)
+
+    while True:
+        player_move(board, player_symbol)
+        display_board(board)
+        if check_win(board, player_symbol):
+            print(Fore.GREEN + "You win!")
+            break
+        if check_full(board):
+            print(Fore.YELLOW + "It's a draw.")
+            break
+
+        solver_move(board, ai_symbol, player_symbol, level)
+        print(Fore.BLUE + "AI has moved.")
+        display_board(board)
+        if check_win(board, ai_symbol):
+            print(Fore.RED + "AI wins!")
+            break
+        if check_full(board):
+            print(Fore.YELLOW + "It's a draw.")
+            break
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play tic tac toe against the computer")
+    parser.add_argument("--level", choices=("easy", "medium", "hard"), default="hard")
+    main(parser.parse_args().level)
@@ -0,0 +1,133 @@
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from tttsolver import LEVELS, Solver, load_game, load_table, to_bits
+
+PLAYERS = ("ai", "random") + LEVELS
+BATCH = 5000
+
+_game = None
+_table = None
+
+
+def make_player(name, rng):
+    """A move function with ai_move's signature: (board, symbol, opponent)."""
+    if name == "ai":
+        return _game.ai_move  # draws from the global random, seeded per batch
+    if name == "random":
+        def move(board, symbol, opponent):
+            board[rng.choice([i for i in range(9) if board[i].isdigit()])] = symbol
+        return move
+
+    solver = Solver(_table, rng)
+
+    def move(board, symbol, opponent):
+        board[solver.move(to_bits(board, symbol), to_bits(board, opponent), name)] = symbol
+    return move
+
+
+def play_batch(a, b, games, seed):
+    """Play games of a against b, alternating who goes first; Counter of results.
+
+    Everything random is seeded from seed, so a batch always plays out the
+    same way whichever process runs it.
+    """
+    global _game, _table
+    if _game is None:
+        _game = load_game()
+        _table = load_table()
+    _game.random.seed(seed)
+    rng = random.Random(seed)
+    players = {a: make_player(a, rng)} if a == b else {a: make_player(a, rng), b: make_player(b, rng)}
+    check_win, check_full = _game.check_win, _game.check_full
+
+    results = Counter()
+    for n in range(games):
+        first, second = ("a", "b") if n % 2 == 0 else ("b", "a")
+        names = {"a": a, "b": b}
+        board = [str(i) for i in range(1, 10)]
+        turn = [(first, "X", "O"), (second, "O", "X")]
+        i = 0
+        while True:
+            side, symbol, opponent = turn[i % 2]
+            players[names[side]](board, symbol, opponent)
+            if check_win(board, symbol):
+                results[side] += 1
+                results["first"] += side == first
+                break
+            if check_full(board):
+                results["draw"] += 1
+                break
+            i += 1
+    return results
+
+
+def run_match(a, b, games, workers=1, seed=0, batch=BATCH):
+    """(results, seconds) for games of a against b spread over processes."""
+    sizes = [min(batch, games - start) for start in range(0, games, batch)]
+    seeds = [seed * 1_000_003 + n for n in range(len(sizes))]
+    start = time.perf_counter()
+    total = Counter()
+    if workers <= 1:
+        for size, batch_seed in zip(sizes, seeds):
+            total += play_batch(a, b, size, batch_seed)
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            for result in pool.map(play_batch, [a] * len(sizes), [b] * len(sizes), sizes, seeds):
+                total += result
+    return total, time.perf_counter() - start
+
+
+def report(a, b, games, results, seconds):
+    print(f"{a} vs {b}: {games:,} games, {games / seconds:,.0f} games/sec")
+    print(f"  {a:<7} wins : {results['a']:>10,} ({results['a'] / games:6.2%})")
+    print(f"  draws        : {results['draw']:>10,} ({results['draw'] / games:6.2%})")
+    print(f"  {b:<7} wins : {results['b']:>10,} ({results['b'] / games:6.2%})")
+    print(f"  first mover won {results['first']:,} times")
+
+
+# (a, b, what must hold) for the regression suite
+SUITE = [
+    ("hard", "hard", lambda r: r["a"] == r["b"] == 0),
+    ("hard", "random", lambda r: r["b"] == 0),
+    ("hard", "ai", lambda r: r["b"] == 0),
+    ("medium", "random", lambda r: r["a"] > r["b"]),
+    ("ai", "random", lambda r: r["a"] > r["b"]),
+]
+
+
+def run_suite(games, workers, seed):
+    failed = False
+    for a, b, check in SUITE:
+        results, seconds = run_match(a, b, games, workers, seed)
+        report(a, b, games, results, seconds)
+        if not check(results):
+            print(f"  FAILED: unexpected result for {a} vs {b}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless tic tac toe self-play and tournaments")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("match", help="play one pairing many times")
+    p.add_argument("a", choices=PLAYERS)
+    p.add_argument("b", choices=PLAYERS)
+    p.add_argument("--games", type=int, default=100000)
+    p = commands.add_parser("suite", help="play fixed pairings and check the expected outcomes")
+    p.add_argument("--games", type=int, default=20000)
+    for p in commands.choices.values():
+        p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        p.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    load_table()  # build the table once before the workers need it
+    if args.command == "suite":
+        sys.exit(run_suite(args.games, args.workers, args.seed))
+    results, seconds = run_match(args.a, args.b, args.games, args.workers, args.seed)
+    report(args.a, args.b, args.games, results, seconds)
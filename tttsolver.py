@@ -0,0 +1,206 @@
+import argparse
+import importlib.util
+import os
+import random
+import time
+
+TABLE_FILE = "ttt_table.bin"
+LEVELS = ("easy", "medium", "hard")
+FULL = 0b111111111
+LINES = [
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),
+    (0, 4, 8), (2, 4, 6)
+]
+LINE_MASKS = [sum(1 << i for i in line) for line in LINES]
+
+# Every 9-bit set of squares, precomputed: does it hold a line, and what is
+# its base-3 weight.  A position (side to move, other side) has the unique
+# index BASE3[me] + 2 * BASE3[opp] below 3 ** 9.
+HAS_LINE = bytes(any(bits & m == m for m in LINE_MASKS) for bits in range(512))
+BASE3 = [sum(3 ** i for i in range(9) if bits >> i & 1) for bits in range(512)]
+
+EXACT, LOWER, UPPER = 0, 1, 2
+NO_ENTRY = 255
+SCORES = 21  # scores run from -10 to 10
+
+
+def index(me, opp):
+    return BASE3[me] + 2 * BASE3[opp]
+
+
+def negamax(me, opp, alpha, beta, tt):
+    """(score, move) for the side to move; faster wins score higher.
+
+    tt maps (me, opp) to (flag, score, move) and keeps bounds from
+    alpha-beta cutoffs as well as exact scores.
+    """
+    entry = tt.get((me, opp))
+    if entry:
+        flag, score, move = entry
+        if flag == EXACT or (flag == LOWER and score >= beta) or (flag == UPPER and score <= alpha):
+            return score, move
+
+    empty = ~(me | opp) & FULL
+    if not empty:
+        return 0, None
+
+    start_alpha = alpha
+    best, best_move = -SCORES, None
+    moves = [i for i in range(9) if empty >> i & 1]
+    if entry and entry[2] is not None:
+        moves.remove(entry[2])
+        moves.insert(0, entry[2])
+    for i in moves:
+        mine = me | 1 << i
+        if HAS_LINE[mine]:
+            score = bin(empty).count("1")
+        else:
+            score = -negamax(opp, mine, -beta, -alpha, tt)[0]
+        if score > best:
+            best, best_move = score, i
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            break
+
+    flag = UPPER if best <= start_alpha else LOWER if best >= beta else EXACT
+    tt[(me, opp)] = (flag, best, best_move)
+    return best, best_move
+
+
+def build_table():
+    """Best move and score for every position reachable from the empty board."""
+    table = bytearray([NO_ENTRY]) * 3 ** 9
+    tt = {}
+    stack, seen = [(0, 0)], set()
+    while stack:
+        me, opp = stack.pop()
+        if (me, opp) in seen or HAS_LINE[opp]:
+            continue
+        seen.add((me, opp))
+        empty = ~(me | opp) & FULL
+        if not empty:
+            continue
+        score, move = negamax(me, opp, -SCORES, SCORES, tt)
+        table[index(me, opp)] = move * SCORES + score + 10
+        stack.extend((opp, me | 1 << i) for i in range(9) if empty >> i & 1)
+    return bytes(table)
+
+
+def load_table(path=TABLE_FILE):
+    try:
+        with open(path, "rb") as f:
+            table = f.read()
+        if len(table) == 3 ** 9:
+            return table
+    except OSError:
+        pass
+    table = build_table()
+    with open(path, "wb") as f:
+        f.write(table)
+    return table
+
+
+class Solver:
+    """Tic tac toe AI that looks moves up in the precomputed table."""
+
+    def __init__(self, table=None, rng=None):
+        self.table = table or load_table()
+        self.rng = rng or random.Random()
+
+    def lookup(self, me, opp):
+        """(move, score) for the side to move, in O(1)."""
+        entry = self.table[index(me, opp)]
+        if entry == NO_ENTRY:
+            raise ValueError("Position is finished or unreachable")
+        return entry // SCORES, entry % SCORES - 10
+
+    def move(self, me, opp, level="hard"):
+        empty = [i for i in range(9) if not (me | opp) >> i & 1]
+        if level == "hard":
+            return self.lookup(me, opp)[0]
+        if level == "medium":
+            # Like the original AI: take a win, else block one, else anything
+            for i in empty:
+                if HAS_LINE[me | 1 << i]:
+                    return i
+            for i in empty:
+                if HAS_LINE[opp | 1 << i]:
+                    return i
+        return self.rng.choice(empty)
+
+
+def to_bits(board, symbol):
+    return sum(1 << i for i, cell in enumerate(board) if cell == symbol)
+
+
+_solver = None
+
+
+def solver_move(board, ai_symbol, player_symbol, level="hard"):
+    """Drop-in for ai_move on the game's list board, with a difficulty level."""
+    global _solver
+    if _solver is None:
+        _solver = Solver()
+    move = _solver.move(to_bits(board, ai_symbol), to_bits(board, player_symbol), level)
+    board[move] = ai_symbol
+
+
+def load_game():
+    """The tic tac toe script as a module; its file name has spaces."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tic tac toe.py")
+    spec = importlib.util.spec_from_file_location("tic_tac_toe", path)
+    game = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(game)
+    return game
+
+
+def random_positions(n, rng):
+    """Unfinished list boards with O to move, sampled from random play."""
+    game = load_game()
+    boards = []
+    while len(boards) < n:
+        board = [str(i) for i in range(1, 10)]
+        for turn in range(rng.randrange(0, 8, 2)):
+            symbol = "X" if turn % 2 == 0 else "O"
+            board[rng.choice([i for i in range(9) if board[i].isdigit()])] = symbol
+        board[rng.choice([i for i in range(9) if board[i].isdigit()])] = "X"
+        if not (game.check_win(board, "X") or game.check_win(board, "O") or game.check_full(board)):
+            boards.append(board)
+    return boards
+
+
+def benchmark(n=50000):
+    start = time.perf_counter()
+    table = build_table()
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    load_table()
+    loaded = time.perf_counter() - start
+    print(f"Table build: {built * 1000:.0f} ms, load: {loaded * 1000:.1f} ms, {len(table)} bytes")
+
+    game = load_game()
+    boards = random_positions(n, random.Random(1))
+    global _solver
+    _solver = Solver(table)
+    for name, move in (("ai_move", game.ai_move), ("solver_move", solver_move)):
+        copies = [b.copy() for b in boards]
+        start = time.perf_counter()
+        for board in copies:
+            move(board, "O", "X")
+        rate = n / (time.perf_counter() - start)
+        print(f"{name:<12}: {rate:12,.0f} moves/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perfect-play tic tac toe solver")
+    parser.add_argument("--build", action="store_true", help=f"rebuild {TABLE_FILE}")
+    parser.add_argument("--bench", type=int, metavar="N", help="time N moves against the original ai_move")
+    args = parser.parse_args()
+
+    if args.build:
+        with open(TABLE_FILE, "wb") as f:
+            f.write(build_table())
+        print(f"Wrote {TABLE_FILE}")
+    if args.bench:
+        benchmark(args.bench)
@@ -0,0 +1,617 @@
+import argparse
+import asyncio
+import gzip
+import hashlib
+import hmac
+import http.client
+import json
+import mimetypes
+import os
+import queue
+import random
+import re
+import secrets
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.utils import formatdate
+from urllib.parse import urlsplit
+
+HOST = "127.0.0.1"
+PORT = 8080
+USERS_DB = "users.db"
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_FILES = ("index.html", "signup.html", "dashboard.html", "style.css", "toast.js", "auth.js", "logo.png")
+SESSION_COOKIE = "session"
+SESSION_TTL = 3600
+HASH_ITERATIONS = 200_000
+DB_CONNECTIONS = 4
+MAX_BODY = 64 * 1024
+EVENT_KEEPALIVE = 15
+EVENT_BACKLOG = 100
+STATUS = {
+    200: "OK", 201: "Created", 302: "Found", 304: "Not Modified", 400: "Bad Request",
+    401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+    413: "Payload Too Large", 500: "Internal Server Error",
+}
+EMAIL = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+# Checked against when the email is unknown, so a miss costs as much as a wrong password
+DUMMY_HASH = f"pbkdf2_sha256${HASH_ITERATIONS}${'00' * 16}${'00' * 32}"
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ================= USERS =================
+
+def hash_password(password, iterations=HASH_ITERATIONS):
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password, stored):
+    _, iterations, salt, digest = stored.split("$")
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), int(iterations))
+    return hmac.compare_digest(candidate.hex(), digest)
+
+
+class UserStore:
+    """SQLite user table behind a small pool of connections.
+
+    Calls block, so the server runs them on a thread pool the same size as
+    the connection pool; each call borrows a connection for its duration.
+    """
+
+    def __init__(self, path=USERS_DB, connections=DB_CONNECTIONS):
+        self.pool = queue.Queue()
+        for _ in range(connections):
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self.pool.put(conn)
+        with self.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                "id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT NOT NULL UNIQUE, "
+                "password TEXT NOT NULL, created TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection and run a transaction on it."""
+        conn = self.pool.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.pool.put(conn)
+
+    def create(self, name, email, password_hash):
+        try:
+            with self.connection() as conn:
+                cur = conn.execute(
+                    "INSERT INTO users (name, email, password, created) VALUES (?, ?, ?, datetime('now'))",
+                    (name, email, password_hash),
+                )
+                return cur.lastrowid
+        except sqlite3.IntegrityError:
+            raise ValueError("An account with this email already exists") from None
+
+    def by_email(self, email):
+        with self.connection() as conn:
+            return conn.execute("SELECT id, name, email, password FROM users WHERE email = ?", (email,)).fetchone()
+
+    def set_password(self, user_id, password_hash):
+        with self.connection() as conn:
+            conn.execute("UPDATE users SET password = ? WHERE id = ?", (password_hash, user_id))
+
+    def close(self):
+        while not self.pool.empty():
+            self.pool.get().close()
+
+
+class SessionCache:
+    """Session token -> user, expiring after ttl seconds without use.
+
+    Every use pushes a session's expiry to now + ttl and moves it to the
+    end, so the OrderedDict stays sorted by expiry and eviction only ever
+    looks at its front.
+    """
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self.entries = OrderedDict()
+
+    def create(self, user):
+        self.evict()
+        token = secrets.token_urlsafe(32)
+        self.entries[token] = (user, time.monotonic() + self.ttl)
+        return token
+
+    def get(self, token):
+        entry = self.entries.get(token)
+        if entry is None:
+            return None
+        user, expires = entry
+        now = time.monotonic()
+        if expires <= now:
+            del self.entries[token]
+            return None
+        self.entries[token] = (user, now + self.ttl)
+        self.entries.move_to_end(token)
+        return user
+
+    def drop(self, token):
+        self.entries.pop(token, None)
+
+    def drop_user(self, user_id, keep=None):
+        """End every session of one user, except the one with token keep."""
+        for token in [t for t, (user, _) in self.entries.items() if user["id"] == user_id and t != keep]:
+            del self.entries[token]
+
+    def evict(self):
+        now = time.monotonic()
+        while self.entries:
+            token, (_, expires) = next(iter(self.entries.items()))
+            if expires > now:
+                break
+            del self.entries[token]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# ================= HTTP =================
+
+class StaticFile:
+    """A file read once at startup, with a gzipped copy and ETags for both."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.body = f.read()
+        self.type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if self.type.startswith("text/") or self.type.endswith("javascript"):
+            self.type += "; charset=utf-8"
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"'
+        gz = gzip.compress(self.body, 9, mtime=0)
+        self.gzipped = gz if len(gz) < len(self.body) else None
+        self.gzip_etag = self.etag[:-1] + '-gz"'
+
+
+def load_static(root=ROOT, names=STATIC_FILES):
+    return {
+        "/" + name: StaticFile(os.path.join(root, name))
+        for name in names if os.path.exists(os.path.join(root, name))
+    }
+
+
+class Request:
+    def __init__(self, method, target, headers, body):
+        self.method = method
+        url = urlsplit(target)
+        self.path = url.path
+        self.query = url.query
+        self.headers = headers
+        self.body = body
+
+    @property
+    def cookies(self):
+        cookies = {}
+        for part in self.headers.get("cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name:
+                cookies[name] = value
+        return cookies
+
+    def json(self):
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HttpError(400, "Invalid JSON") from None
+        if not isinstance(data, dict):
+            raise HttpError(400, "Expected a JSON object")
+        return data
+
+
+class Response:
+    def __init__(self, status=200, body=b"", content_type="application/json", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = {"Content-Type": content_type, **(headers or {})}
+
+    @classmethod
+    def json(cls, data, status=200, headers=None):
+        return cls(status, json.dumps(data).encode(), headers=headers)
+
+    def encode(self, keep_alive=True):
+        head = [f"HTTP/1.1 {self.status} {STATUS.get(self.status, '')}"]
+        headers = {
+            **self.headers,
+            "Content-Length": str(len(self.body)),
+            "Date": formatdate(usegmt=True),
+            "Connection": "keep-alive" if keep_alive else "close",
+        }
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + self.body
+
+
+class EventStream:
+    """Server-sent events fanned out to every subscribed connection.
+
+    Each subscriber has a bounded queue; one that falls EVENT_BACKLOG
+    events behind misses the newer ones rather than growing without limit.
+    """
+
+    def __init__(self):
+        self.queues = set()
+
+    def publish(self, event, data):
+        for q in self.queues:
+            if not q.full():
+                q.put_nowait((event, data))
+
+    def subscribe(self, *initial):
+        """A response streaming every later event, preceded by the (event, data) pairs given."""
+        q = asyncio.Queue(EVENT_BACKLOG)
+        for item in initial:
+            q.put_nowait(item)
+        self.queues.add(q)
+        return Subscription(self, q)
+
+    def __len__(self):
+        return len(self.queues)
+
+
+class Subscription:
+    """Takes over a connection and writes text/event-stream until it closes."""
+
+    HEAD = (
+        "HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+        "Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n"
+    ).encode("latin-1")
+
+    def __init__(self, stream, queue):
+        self.stream = stream
+        self.queue = queue
+
+    async def send(self, reader, writer):
+        # An event stream client never sends anything, so a read only
+        # returns once the connection closes, from either end
+        closed = asyncio.ensure_future(reader.read(1))
+        try:
+            writer.write(self.HEAD)
+            while not closed.done():
+                get = asyncio.ensure_future(self.queue.get())
+                await asyncio.wait((get, closed), timeout=EVENT_KEEPALIVE, return_when=asyncio.FIRST_COMPLETED)
+                if get.done():
+                    event, data = get.result()
+                    writer.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+                else:
+                    get.cancel()
+                    writer.write(b": keep-alive\n\n")
+                await writer.drain()
+        finally:
+            closed.cancel()
+            self.stream.queues.discard(self.queue)
+
+
+async def read_request(reader):
+    """Parse one HTTP/1.1 request; None when the client closed the connection."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "Malformed request line") from None
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "Invalid Content-Length") from None
+    if length < 0:
+        raise HttpError(400, "Invalid Content-Length")
+    if length > MAX_BODY:
+        raise HttpError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method, target, headers, body)
+
+
+# ================= APP =================
+
+class WebApp:
+    """Backend for the login, signup and dashboard pages.
+
+    Static files are served from memory, gzipped when the client accepts
+    it, with ETags so repeat visits get a 304.  Password hashing and user
+    queries run on thread pools so a slow login never stalls the event
+    loop; sessions live in an in-memory cache with a sliding TTL.
+    """
+
+    def __init__(self, host=HOST, port=PORT, db=USERS_DB, root=ROOT):
+        self.host = host
+        self.port = port
+        self.users = UserStore(db)
+        self.sessions = SessionCache()
+        self.static = load_static(root)
+        self.hasher = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        self.db_thread = ThreadPoolExecutor(max_workers=DB_CONNECTIONS)
+        self.clients = {}
+        self.routes = {
+            ("POST", "/api/signup"): self.signup,
+            ("POST", "/api/login"): self.login,
+            ("POST", "/api/logout"): self.logout,
+            ("GET", "/api/me"): self.me,
+            ("POST", "/api/password"): self.change_password,
+        }
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        return self.server
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Serving on http://{self.host}:{self.port}/")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        for writer in self.clients.values():
+            writer.close()
+        await asyncio.gather(*self.clients, return_exceptions=True)
+        self.hasher.shutdown()
+        self.db_thread.shutdown()
+        self.users.close()
+
+    async def handle(self, reader, writer):
+        self.clients[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    response = await self.dispatch(request)
+                except HttpError as e:
+                    request, response = None, Response.json({"ok": False, "error": str(e)}, e.status)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:
+                    print(f"{type(e).__name__} while handling a request: {e}", file=sys.stderr)
+                    request, response = None, Response.json({"ok": False, "error": "Internal server error"}, 500)
+                if isinstance(response, Subscription):
+                    await response.send(reader, writer)
+                    break
+                keep_alive = request is not None and request.headers.get("connection", "").lower() != "close"
+                writer.write(response.encode(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self.clients[asyncio.current_task()]
+            writer.close()
+
+    async def dispatch(self, request):
+        route = self.routes.get((request.method, request.path))
+        if route:
+            return await route(request)
+        if request.method == "GET":
+            return self.serve_static(request)
+        raise HttpError(405 if request.path in self.static else 404, "Not found")
+
+    def serve_static(self, request):
+        path = "/index.html" if request.path == "/" else request.path
+        if path == "/dashboard.html" and not self.current_user(request):
+            return Response(302, headers={"Location": "/index.html"})
+        f = self.static.get(path)
+        if f is None:
+            raise HttpError(404, "Not found")
+
+        use_gzip = f.gzipped is not None and "gzip" in request.headers.get("accept-encoding", "")
+        etag = f.gzip_etag if use_gzip else f.etag
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(304, content_type=f.type, headers=headers)
+        if use_gzip:
+            return Response(200, f.gzipped, f.type, {**headers, "Content-Encoding": "gzip"})
+        return Response(200, f.body, f.type, headers)
+
+    def current_user(self, request):
+        return self.sessions.get(request.cookies.get(SESSION_COOKIE, ""))
+
+    def start_session(self, user, status=200):
+        token = self.sessions.create(user)
+        cookie = f"{SESSION_COOKIE}={token}; HttpOnly; SameSite=Lax; Path=/; Max-Age={self.sessions.ttl}"
+        return Response.json({"ok": True, "user": user}, status, {"Set-Cookie": cookie})
+
+    async def run(self, pool, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+    async def signup(self, request):
+        data = request.json()
+        name = str(data.get("name", "")).strip()
+        email = str(data.get("email", "")).strip().lower()
+        password = str(data.get("password", ""))
+        if not name or not EMAIL.fullmatch(email):
+            raise HttpError(400, "Enter your name and a valid email")
+        if len(password) < 6:
+            raise HttpError(400, "Password must be at least 6 characters")
+
+        password_hash = await self.run(self.hasher, hash_password, password)
+        try:
+            user_id = await self.run(self.db_thread, self.users.create, name, email, password_hash)
+        except ValueError as e:
+            raise HttpError(409, str(e)) from None
+        return self.start_session({"id": user_id, "name": name, "email": email}, 201)
+
+    async def login(self, request):
+        data = request.json()
+        email = str(data.get("email", "")).strip().lower()
+        password = str(data.get("password", ""))
+        row = await self.run(self.db_thread, self.users.by_email, email)
+        matched = await self.run(self.hasher, verify_password, password, DUMMY_HASH if row is None else row[3])
+        if row is None or not matched:
+            raise HttpError(401, "Wrong email or password")
+        return self.start_session({"id": row[0], "name": row[1], "email": row[2]})
+
+    async def logout(self, request):
+        self.sessions.drop(request.cookies.get(SESSION_COOKIE, ""))
+        return Response.json({"ok": True}, headers={"Set-Cookie": f"{SESSION_COOKIE}=; Path=/; Max-Age=0"})
+
+    async def me(self, request):
+        user = self.current_user(request)
+        if user is None:
+            raise HttpError(401, "Not logged in")
+        # Tells the dashboard whether this server pushes live order totals
+        live = ("GET", "/api/orders/live") in self.routes
+        return Response.json({"ok": True, "user": user, "live": live})
+
+    async def change_password(self, request):
+        user = self.current_user(request)
+        if user is None:
+            raise HttpError(401, "Not logged in")
+        password = str(request.json().get("password", ""))
+        if len(password) < 6:
+            raise HttpError(400, "Password must be at least 6 characters")
+        password_hash = await self.run(self.hasher, hash_password, password)
+        await self.run(self.db_thread, self.users.set_password, user["id"], password_hash)
+        # Anyone else holding a session for this account is signed out
+        self.sessions.drop_user(user["id"], keep=request.cookies.get(SESSION_COOKIE))
+        return Response.json({"ok": True})
+
+
+# ================= LOAD TEST =================
+
+def start_in_thread(app):
+    """Run app on its own event loop thread; returns (loop, port)."""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(app.start())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return loop, app.server.sockets[0].getsockname()[1]
+
+
+def stop_thread(app, loop):
+    asyncio.run_coroutine_threadsafe(app.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+
+LOAD_TEST_USER = {"name": "Load Test", "email": "load@test.local", "password": "secret123"}
+
+
+def signup_cookie(port, user=LOAD_TEST_USER):
+    """Sign a user up and return their session cookie as name=value."""
+    conn = http.client.HTTPConnection(HOST, port)
+    conn.request("POST", "/api/signup", json.dumps(user), {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.getheader("Set-Cookie").split(";")[0]
+
+
+def hammer(port, mix, clients, seconds):
+    """Send a weighted mix of requests from N keep-alive clients.
+
+    mix holds (name, weight, method, path, body, headers) entries; returns
+    ({name: [seconds per request]}, elapsed seconds).
+    """
+    weights = [m[1] for m in mix]
+    latencies = defaultdict(list)
+
+    def client(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection(HOST, port)
+        mine = defaultdict(list)
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            name, _, method, path, body, headers = rng.choices(mix, weights)[0]
+            start = time.perf_counter()
+            conn.request(method, path, body, headers)
+            response = conn.getresponse()
+            response.read()
+            mine[name].append(time.perf_counter() - start)
+        conn.close()
+        for name, values in mine.items():
+            latencies[name].extend(values)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    begin = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, time.perf_counter() - begin
+
+
+def print_latencies(latencies, clients, elapsed):
+    every = sorted(v for values in latencies.values() for v in values)
+    print(f"Clients    : {clients}")
+    print(f"Throughput : {len(every) / elapsed:,.0f} requests/sec")
+    print(f"{'':<22}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, values in [*sorted(latencies.items()), ("all", every)]:
+        values = sorted(values)
+        p99 = values[min(int(len(values) * 0.99), len(values) - 1)]
+        print(f"{name:<22}{len(values):>8}{statistics.median(values) * 1000:>10.2f}"
+              f"{p99 * 1000:>10.2f}{values[-1] * 1000:>10.2f}")
+
+
+def load_test(clients, seconds):
+    """Mixed page/API traffic from N keep-alive clients against an in-process server."""
+    tmp = tempfile.TemporaryDirectory()
+    app = WebApp(port=0, db=os.path.join(tmp.name, "users.db"))
+    loop, port = start_in_thread(app)
+    cookie = signup_cookie(port)
+    credentials = json.dumps(LOAD_TEST_USER)
+
+    css = app.static["/style.css"]
+    mix = [
+        ("GET /style.css", 40, "GET", "/style.css", None, {"Accept-Encoding": "gzip"}),
+        ("GET /style.css 304", 20, "GET", "/style.css", None, {"Accept-Encoding": "gzip", "If-None-Match": css.gzip_etag}),
+        ("GET /api/me", 30, "GET", "/api/me", None, {"Cookie": cookie}),
+        ("GET /dashboard.html", 8, "GET", "/dashboard.html", None, {"Cookie": cookie, "Accept-Encoding": "gzip"}),
+        ("POST /api/login", 2, "POST", "/api/login", credentials, {"Content-Type": "application/json"}),
+    ]
+    latencies, elapsed = hammer(port, mix, clients, seconds)
+    stop_thread(app, loop)
+    tmp.cleanup()
+    print_latencies(latencies, clients, elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backend for the login/signup/dashboard pages")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--db", default=USERS_DB)
+    parser.add_argument("--loadtest", type=int, metavar="CLIENTS", help="simulate CLIENTS concurrent browsers and exit")
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    if args.loadtest:
+        load_test(args.loadtest, args.seconds)
+    else:
+        asyncio.run(WebApp(args.host, args.port, args.db).serve_forever())